@@ -0,0 +1,85 @@
+# backend/api/images/derivatives.py
+"""
+Resized variants of uploaded images.
+
+Listings show 64 px thumbnails, but the originals are full-resolution
+phone photos. Each upload gets derivatives per size and format, built on
+first request and stored under uploads/derivatives next to the originals:
+
+    uploads/<name>.jpg -> uploads/derivatives/<name>_thumb.webp
+
+Upload names are random UUIDs and never reused, so a derivative URL
+always names the same bytes and can be cached as immutable.
+"""
+
+from pathlib import Path
+from typing import Dict, Optional
+import logging
+import os
+import tempfile
+from PIL import Image, ImageOps
+from llm.image_prep import to_rgb
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels; thumb covers the 64 px list cells at 2x density
+DERIVATIVE_SIZES: Dict[str, int] = {
+    'thumb': int(os.getenv('IMAGE_THUMB_EDGE', '160')),
+    'medium': int(os.getenv('IMAGE_MEDIUM_EDGE', '800')),
+}
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+DERIVATIVES_DIRNAME = 'derivatives'
+
+class DerivativeError(ValueError):
+    """Unknown size or format, or a path outside the upload directory"""
+
+def resolve_original(upload_dir: Path, image_path: str) -> Optional[Path]:
+    """The uploaded file for an item's image_path ('uploads/<name>' or '<name>'), if it exists"""
+    name = image_path[len('uploads/'):] if image_path.startswith('uploads/') else image_path
+    upload_dir = upload_dir.resolve()
+    original = (upload_dir / name).resolve()
+    # Only originals directly in the upload directory
+    if original.parent != upload_dir:
+        raise DerivativeError('Invalid image path')
+    return original if original.is_file() else None
+
+def derivative_path(original: Path, size: str, fmt: str) -> Path:
+    if size not in DERIVATIVE_SIZES:
+        raise DerivativeError(f"size must be one of {', '.join(DERIVATIVE_SIZES)}")
+    if fmt not in DERIVATIVE_FORMATS:
+        raise DerivativeError(f"format must be one of {', '.join(DERIVATIVE_FORMATS)}")
+    return original.parent / DERIVATIVES_DIRNAME / f"{original.stem}_{size}.{fmt}"
+
+def render_derivative(original: Path, target: Path, edge: int, fmt: str) -> None:
+    """Orient, downscale and encode one derivative; written atomically"""
+    pil_format, _, options = DERIVATIVE_FORMATS[fmt]
+    with Image.open(original) as image:
+        image.draft('RGB', (edge, edge))
+        resized = to_rgb(ImageOps.exif_transpose(image))
+        resized.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Concurrent first requests may both render; the rename makes the last one win whole
+        fd, temp_name = tempfile.mkstemp(dir=target.parent, suffix=f'.{fmt}.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                resized.save(f, pil_format, **options)
+            os.replace(temp_name, target)
+        except BaseException:
+            os.unlink(temp_name)
+            raise
+    logger.debug(f"Rendered {target.name}: {os.path.getsize(original)} -> {os.path.getsize(target)} bytes")
+
+def ensure_derivative(original: Path, size: str, fmt: str) -> Path:
+    """Path of the derivative, rendering it if missing or older than the original"""
+    target = derivative_path(original, size, fmt)
+    try:
+        if target.stat().st_mtime >= original.stat().st_mtime:
+            return target
+    except FileNotFoundError:
+        pass
+    render_derivative(original, target, DERIVATIVE_SIZES[size], fmt)
+    return target
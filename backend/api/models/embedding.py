@@ -1,28 +1,35 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, LargeBinary
 from sqlalchemy.orm import relationship
 from database.db import Base
-import json
+import numpy as np
 
 class ItemEmbedding(Base):
     __tablename__ = "item_embeddings"
 
     id = Column(Integer, primary_key=True)
     item_id = Column(Integer, ForeignKey('stored_items.id', ondelete='CASCADE'), unique=True)
-    embedding_vector = Column(JSON)  # Store the embedding as JSON array instead of ARRAY
+    embedding_vector = Column(LargeBinary)  # Raw little-endian float32 bytes (4 bytes per dimension)
     text_content = Column(String)  # Store the text that was embedded
     model_version = Column(String)  # Store which model version created the embedding
     last_updated = Column(String)  # Timestamp of last update
-    
+
     # Relationship to StoredItem
     item = relationship("StoredItem", back_populates="embedding")
 
+    @staticmethod
+    def encode_vector(vector) -> bytes:
+        """Pack a vector into compact float32 bytes"""
+        return np.asarray(vector, dtype='<f4').tobytes()
+
+    @staticmethod
+    def decode_vector(data: bytes) -> np.ndarray:
+        """Unpack float32 bytes into a numpy array"""
+        return np.frombuffer(data, dtype='<f4')
+
     def set_vector(self, vector):
-        """Convert numpy array to list for JSON storage"""
-        if hasattr(vector, 'tolist'):  # If it's a numpy array
-            self.embedding_vector = vector.tolist()
-        else:
-            self.embedding_vector = list(vector)
+        """Store a numpy array or list as float32 bytes"""
+        self.embedding_vector = self.encode_vector(vector)
 
     def get_vector(self):
-        """Get the vector as a list"""
-        return self.embedding_vector 
\ No newline at end of file
+        """Get the vector as a float32 numpy array"""
+        return self.decode_vector(self.embedding_vector)
@@ -1,5 +1,5 @@
 # backend/api/models/item.py
-from sqlalchemy import Column, Integer, String, JSON, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, JSON, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from database.db import Base
 from datetime import datetime
@@ -7,6 +7,14 @@ from .embedding import ItemEmbedding
 
 class StoredItem(Base):
     __tablename__ = 'stored_items'
+    # Existing databases get these through database/migrations.py
+    __table_args__ = (
+        Index('ix_stored_items_category', 'category', 'subcategory', 'brand'),  # /list filters
+        Index('ix_stored_items_brand_model', 'brand', 'model'),
+        Index('ix_stored_items_shelf', 'shelf_id', 'container_id'),
+        Index('ix_stored_items_container', 'container_id'),
+        Index('ix_stored_items_last_modified', 'last_modified', 'id'),  # order=last_modified pages
+    )
 
     id = Column(Integer, primary_key=True)
     category = Column(String, nullable=False)
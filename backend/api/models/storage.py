@@ -1,6 +1,6 @@
 # backend/api/models/storage.py
 
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from database.db import Base
 import enum
@@ -44,6 +44,9 @@ class StorageLevel1(Base):
 class StorageLevel2(Base):
     """Represents boxes or organizers on shelves (Level 2)"""
     __tablename__ = 'storage_level2'
+    __table_args__ = (
+        Index('ix_storage_level2_shelf_name', 'shelf_id', 'name'),
+    )
 
     id = Column(Integer, primary_key=True)
     shelf_id = Column(Integer, ForeignKey('storage_level1.id', ondelete='CASCADE'))
@@ -70,6 +73,9 @@ class StorageLevel2(Base):
 class StorageLevel3(Base):
     """Represents compartments within boxes or drawers (Level 3)"""
     __tablename__ = 'storage_level3'
+    __table_args__ = (
+        Index('ix_storage_level3_container', 'container_id'),
+    )
 
     id = Column(Integer, primary_key=True)
     container_id = Column(Integer, ForeignKey('storage_level2.id', ondelete='CASCADE'))
@@ -0,0 +1,186 @@
+from typing import List, Iterable, Optional
+import numpy as np
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+class IVFIndex:
+    """
+    Inverted-file approximate nearest-neighbour index.
+
+    A spherical k-means quantizer splits the vectors into `nlist` clusters.
+    A query only scans the members of the `nprobe` clusters whose centroids
+    score highest, so raising nprobe trades latency for recall.
+    The index only stores item ids; exact rescoring of the candidates is
+    done by the vector store that owns the vectors.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, nlist: int = 0, nprobe: int = 16, train_iterations: int = 10,
+                 train_sample_per_list: int = 64, seed: int = 0):
+        self.nlist = nlist  # 0 picks a size from the training set
+        self.nprobe = nprobe
+        self.train_iterations = train_iterations
+        self.train_sample_per_list = train_sample_per_list
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._arrays: List[Optional[np.ndarray]] = []  # Cached np views of _lists
+        self._list_of = {}  # item_id -> list number
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def __len__(self) -> int:
+        return len(self._list_of)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._list_of
+
+    def ids(self) -> np.ndarray:
+        """All item ids held by the index"""
+        return np.fromiter(self._list_of.keys(), dtype=np.int64, count=len(self._list_of))
+
+    def train(self, vectors: np.ndarray) -> None:
+        """Fit the coarse quantizer with spherical k-means on a sample of vectors"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        count = len(vectors)
+        if count == 0:
+            raise ValueError("Cannot train an IVF index without vectors")
+
+        nlist = self.nlist or max(1, int(4 * np.sqrt(count)))
+        nlist = min(nlist, count)
+        rng = np.random.default_rng(self.seed)
+
+        sample_size = min(count, nlist * self.train_sample_per_list)
+        sample = vectors[rng.choice(count, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self.train_iterations):
+            assignment = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=nlist)
+
+            # Re-seed empty clusters with random sample points
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+
+        self.nlist = nlist
+        self.centroids = centroids.astype(np.float32)
+        self._lists = [[] for _ in range(nlist)]
+        self._arrays = [None] * nlist
+        self._list_of = {}
+        logger.info(f"Trained IVF index with {nlist} lists on {sample_size} vectors")
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+        """Nearest centroid for each vector, chunked to bound temporary memory"""
+        assignment = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk_size):
+            scores = vectors[start:start + chunk_size] @ centroids.T
+            assignment[start:start + chunk_size] = np.argmax(scores, axis=1)
+        return assignment
+
+    def add(self, item_ids: Iterable[int], vectors: np.ndarray) -> None:
+        """Insert items, moving any that are already indexed to their new list"""
+        if not self.is_trained:
+            raise RuntimeError("IVF index must be trained before adding vectors")
+
+        item_ids = [int(item_id) for item_id in item_ids]
+        if not item_ids:
+            return
+        self.remove(item_id for item_id in item_ids if item_id in self._list_of)
+
+        assignment = self._assign(np.asarray(vectors, dtype=np.float32), self.centroids)
+        for item_id, list_no in zip(item_ids, assignment.tolist()):
+            self._lists[list_no].append(item_id)
+            self._arrays[list_no] = None
+            self._list_of[item_id] = list_no
+
+    def remove(self, item_ids: Iterable[int]) -> None:
+        """Delete items from their inverted lists"""
+        for item_id in list(item_ids):
+            list_no = self._list_of.pop(int(item_id), None)
+            if list_no is None:
+                continue
+            self._lists[list_no].remove(int(item_id))
+            self._arrays[list_no] = None
+
+    def _list_array(self, list_no: int) -> np.ndarray:
+        array = self._arrays[list_no]
+        if array is None:
+            array = np.asarray(self._lists[list_no], dtype=np.int64)
+            self._arrays[list_no] = array
+        return array
+
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Item ids in the nprobe lists closest to the query"""
+        if not self.is_trained:
+            raise RuntimeError("IVF index is not trained")
+
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        centroid_scores = self.centroids @ np.asarray(query, dtype=np.float32)
+        if nprobe < self.nlist:
+            probe = np.argpartition(centroid_scores, -nprobe)[-nprobe:]
+        else:
+            probe = np.arange(self.nlist)
+
+        arrays = [self._list_array(list_no) for list_no in probe.tolist()]
+        return np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int64)
+
+    def save(self, path: str, tag: str = "") -> None:
+        """Write the index to an .npz file; `tag` identifies the embedding model"""
+        if not self.is_trained:
+            raise RuntimeError("Cannot save an untrained IVF index")
+
+        lengths = np.asarray([len(ids) for ids in self._lists], dtype=np.int64)
+        flat = np.concatenate([self._list_array(n) for n in range(self.nlist)]) \
+            if self.nlist else np.empty(0, dtype=np.int64)
+
+        # Write to a temporary file first so a crash never leaves a torn index
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                format_version=np.int64(self.FORMAT_VERSION),
+                tag=np.str_(tag),
+                nprobe=np.int64(self.nprobe),
+                centroids=self.centroids,
+                list_lengths=lengths,
+                list_ids=flat
+            )
+        os.replace(tmp_path, path)
+        logger.info(f"Saved IVF index with {len(self)} items to {path}")
+
+    @classmethod
+    def load(cls, path: str, tag: str = "") -> Optional["IVFIndex"]:
+        """Read an index written by save(); returns None if missing or incompatible"""
+        if not os.path.exists(path):
+            return None
+
+        with np.load(path) as data:
+            if int(data["format_version"]) != cls.FORMAT_VERSION or str(data["tag"]) != tag:
+                logger.info(f"Ignoring incompatible IVF index at {path}")
+                return None
+
+            index = cls(nlist=len(data["centroids"]), nprobe=int(data["nprobe"]))
+            index.centroids = data["centroids"].astype(np.float32)
+            offsets = np.concatenate([[0], np.cumsum(data["list_lengths"])])
+            flat = data["list_ids"]
+
+        index._lists = [flat[offsets[n]:offsets[n + 1]].tolist() for n in range(index.nlist)]
+        index._arrays = [None] * index.nlist
+        index._list_of = {
+            item_id: list_no
+            for list_no, ids in enumerate(index._lists)
+            for item_id in ids
+        }
+        logger.info(f"Loaded IVF index with {len(index)} items from {path}")
+        return index
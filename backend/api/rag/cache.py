@@ -0,0 +1,162 @@
+from typing import Any, Dict, Hashable, Iterable, Optional, Sequence
+from collections import OrderedDict
+import numpy as np
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used as a cache key"""
+    return " ".join(query.lower().split())
+
+class LRUCache:
+    """Bounded in-process LRU cache with per-entry TTL and hit/miss counters"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl  # Seconds; 0 or less disables expiry
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires = entry
+            if expires is None or expires > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.pop(key)
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl > 0 else None
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self.pop(next(iter(self._entries)))
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Remove an entry; subclasses hook in here to keep side indexes in sync"""
+        entry = self._entries.pop(key, None)
+        return entry[0] if entry is not None else None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+class QueryEmbeddingCache(LRUCache):
+    """Query embeddings keyed by embedding model and normalized query text"""
+
+    def get_embedding(self, query: str, model: str) -> Optional[np.ndarray]:
+        return self.get((model, normalize_query(query)))
+
+    def put_embedding(self, query: str, model: str, embedding) -> None:
+        self.put((model, normalize_query(query)), np.asarray(embedding, dtype=np.float32))
+
+class AnswerCache(LRUCache):
+    """
+    RAG answers keyed by normalized query and the ids of the retrieved items.
+
+    Entries are dropped when any of their items change (see invalidate_items).
+    With a similarity threshold set, a query that retrieved the same items and
+    whose embedding is close enough to a cached query reuses that answer.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600, similarity_threshold: float = 0.0):
+        super().__init__(maxsize, ttl)
+        self.similarity_threshold = similarity_threshold  # 0 disables near matches
+        self._keys_by_item: Dict[int, set] = {}
+        self._keys_by_items: Dict[tuple, set] = {}
+        self._embeddings: Dict[Hashable, np.ndarray] = {}
+
+    @staticmethod
+    def make_key(query: str, item_ids: Sequence[int]) -> tuple:
+        return (normalize_query(query), tuple(item_ids))
+
+    def get_answer(self, query: str, item_ids: Sequence[int], query_embedding=None) -> Optional[Dict]:
+        key = self.make_key(query, item_ids)
+        if key in self._entries or not self.similarity_threshold or query_embedding is None:
+            return self.get(key)
+
+        # Near match: same retrieved items and a similar query embedding
+        query_embedding = np.asarray(query_embedding, dtype=np.float32)
+        best_key, best_score = None, self.similarity_threshold
+        for candidate in self._keys_by_items.get(key[1], ()):
+            embedding = self._embeddings.get(candidate)
+            if embedding is None:
+                continue
+            score = float(embedding @ query_embedding)
+            if score >= best_score:
+                best_key, best_score = candidate, score
+        return self.get(best_key if best_key is not None else key)
+
+    def put_answer(self, query: str, item_ids: Sequence[int], answer: Dict, query_embedding=None) -> None:
+        key = self.make_key(query, item_ids)
+        self.put(key, answer)
+        if key not in self._entries:
+            return
+        for item_id in key[1]:
+            self._keys_by_item.setdefault(item_id, set()).add(key)
+        self._keys_by_items.setdefault(key[1], set()).add(key)
+        if query_embedding is not None:
+            self._embeddings[key] = np.asarray(query_embedding, dtype=np.float32)
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        value = super().pop(key)
+        self._embeddings.pop(key, None)
+        for item_id in key[1]:
+            keys = self._keys_by_item.get(item_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_item[item_id]
+        keys = self._keys_by_items.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_items[key[1]]
+        return value
+
+    def invalidate_items(self, item_ids: Iterable[int]) -> int:
+        """Drop every cached answer that was built from any of these items"""
+        keys = set()
+        for item_id in item_ids:
+            keys.update(self._keys_by_item.get(item_id, ()))
+        for key in keys:
+            self.pop(key)
+        if keys:
+            logger.debug(f"Invalidated {len(keys)} cached answers")
+        return len(keys)
+
+    def clear(self) -> None:
+        super().clear()
+        self._keys_by_item.clear()
+        self._keys_by_items.clear()
+        self._embeddings.clear()
+
+# Shared answer cache; write paths call answer_cache.invalidate_items()
+answer_cache = AnswerCache(
+    maxsize=int(os.getenv('RAG_ANSWER_CACHE_SIZE', '512')),
+    ttl=float(os.getenv('RAG_ANSWER_CACHE_TTL', '3600')),
+    similarity_threshold=float(os.getenv('RAG_ANSWER_CACHE_SIMILARITY', '0'))
+)
@@ -1,10 +1,23 @@
-from typing import List, Dict, Any
-import numpy as np
+from typing import List, Dict, Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterator, Tuple
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from ..models.item import StoredItem
 from ..models.storage import StorageLevel1, StorageLevel2
-from openai import AsyncOpenAI
+from ..models.embedding import ItemEmbedding
+from .vector_store import InventoryVectorStore
+from database.db import run_in_read_session, run_in_session
+from openai import (
+    AsyncOpenAI,
+    APIConnectionError,
+    BadRequestError,
+    InternalServerError,
+    RateLimitError
+)
+import asyncio
+import hashlib
 import logging
+import os
+import random
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -12,10 +25,27 @@ logger = logging.getLogger(__name__)
 class InventoryEmbeddingManager:
     def __init__(self):
         self.embedding_model = "text-embedding-3-small"
-        self.async_client = AsyncOpenAI()
+        self._async_client = None  # Created on first use, so importing needs no API key
+        # Keep IN (...) lists well below SQLite's bound parameter limit
+        self.write_chunk_size = 500
+        # Rows fetched per keyset page when streaming items and embeddings
+        self.read_chunk_size = int(os.getenv('EMBEDDING_READ_CHUNK', '1000'))
 
-    def generate_item_text(self, item: StoredItem, storage: Dict = None) -> str:
-        """Generate text description for an item"""
+        # Embedding request shaping
+        self.max_concurrency = int(os.getenv('EMBEDDING_MAX_CONCURRENCY', '4'))
+        self.batch_token_budget = int(os.getenv('EMBEDDING_BATCH_TOKENS', '50000'))
+        self.max_batch_items = int(os.getenv('EMBEDDING_MAX_BATCH_ITEMS', '512'))
+        self.max_retries = int(os.getenv('EMBEDDING_MAX_RETRIES', '5'))
+        self.progress = {"state": "idle", "scanned": 0, "done": 0, "retries": 0}
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI()
+        return self._async_client
+
+    def generate_item_text(self, item, storage: Dict = None) -> str:
+        """Generate text description for an item (a StoredItem or a row with its columns)"""
         parts = []
         
         # Add basic item information
@@ -36,67 +66,369 @@ class InventoryEmbeddingManager:
         if storage:
             location_parts = []
             if storage.get('shelf'):
-                shelf = storage['shelf']  # This is a StorageLevel1 object
-                location_parts.append(shelf.name)  # Access the name directly
+                location_parts.append(storage['shelf'])  # Shelf name
             if storage.get('container'):
-                container = storage['container']  # This is a StorageLevel2 object
-                location_parts.append(container.name)  # Access the name directly
+                location_parts.append(storage['container'])  # Container name
             if location_parts:
                 parts.append(f"Location: {' - '.join(location_parts)}")
         
         return "\n".join(parts)
 
-    async def create_embeddings(self, db: Session) -> List[Dict[str, Any]]:
-        """Create embeddings for all items"""
-        try:
-            # Get all items with their storage locations
-            items = db.query(StoredItem).all()
-            embeddings_data = []
-            
-            # Process items in batches
-            batch_size = 10
-            for i in range(0, len(items), batch_size):
-                batch = items[i:i + batch_size]
-                
-                # Get storage locations for batch
-                storage_locations = {}
-                for item in batch:
-                    if item.shelf_id:
-                        shelf = db.query(StorageLevel1).filter_by(id=item.shelf_id).first()
-                        container = None
-                        if item.container_id:
-                            container = db.query(StorageLevel2).filter_by(id=item.container_id).first()
-                        storage_locations[item.shelf_id] = {
-                            'shelf': shelf,  # Store the actual model objects
-                            'container': container
-                        }
-                
-                # Generate text and get embeddings for batch
-                batch_texts = []
-                for item in batch:
-                    storage = storage_locations.get(item.shelf_id)
-                    text = self.generate_item_text(item, storage)
-                    batch_texts.append(text)
-                
-                # Get embeddings for batch
-                response = await self.async_client.embeddings.create(
-                    input=batch_texts,
-                    model=self.embedding_model
+    async def iter_item_texts(self) -> AsyncIterator[Tuple[Any, str]]:
+        """
+        Stream (row, text) pairs for every item.
+
+        Items are read joined with their shelf and container names, one keyset
+        page at a time, each page in its own short read session on the DB
+        executor. No connection is held while embeddings are requested, and
+        memory doesn't grow with the inventory.
+        """
+        query = select(
+            StoredItem.id,
+            StoredItem.category,
+            StoredItem.subcategory,
+            StoredItem.brand,
+            StoredItem.model,
+            StoredItem.technical_details,
+            StoredItem.shelf_id,
+            StoredItem.last_modified,
+            StorageLevel1.name.label('shelf_name'),
+            StorageLevel2.name.label('container_name')
+        ).outerjoin(
+            StorageLevel1, StoredItem.shelf_id == StorageLevel1.id
+        ).outerjoin(
+            StorageLevel2, StoredItem.container_id == StorageLevel2.id
+        ).order_by(StoredItem.id).limit(self.read_chunk_size)
+
+        def fetch_page(db, after):
+            return db.execute(query.where(StoredItem.id > after)).all()
+
+        last_id = 0
+        while True:
+            rows = await run_in_read_session(fetch_page, last_id)
+            if not rows:
+                return
+            for row in rows:
+                storage = None
+                if row.shelf_id:
+                    storage = {'shelf': row.shelf_name, 'container': row.container_name}
+                yield row, self.generate_item_text(row, storage)
+            last_id = rows[-1].id
+
+    @staticmethod
+    def content_hash(text: str) -> bytes:
+        """Hash of the text that gets embedded, used to detect changed items"""
+        return hashlib.sha256((text or "").encode("utf-8")).digest()
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Cheap upper-bound token estimate (about 3 characters per token)"""
+        return len(text) // 3 + 1
+
+    async def make_batches(self, entries: AsyncIterable[Dict[str, Any]]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Group entries into batches that fit the per-request token budget"""
+        batch, batch_tokens = [], 0
+        async for entry in entries:
+            tokens = self.estimate_tokens(entry["text"])
+            if batch and (batch_tokens + tokens > self.batch_token_budget
+                          or len(batch) >= self.max_batch_items):
+                yield batch
+                batch, batch_tokens = [], 0
+            batch.append(entry)
+            batch_tokens += tokens
+        if batch:
+            yield batch
+
+    async def _embed_batch(
+        self,
+        batch: List[Dict[str, Any]],
+        semaphore: asyncio.Semaphore
+    ) -> List[Dict[str, Any]]:
+        """Embed one batch, retrying transient failures and splitting rejected batches"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with semaphore:
+                    response = await self.async_client.embeddings.create(
+                        input=[entry["text"] for entry in batch],
+                        model=self.embedding_model
+                    )
+                break
+            except BadRequestError:
+                # Usually a batch over the request token limit; halve it and retry
+                if len(batch) == 1:
+                    raise
+                middle = len(batch) // 2
+                logger.warning(f"Embedding batch of {len(batch)} rejected, splitting it")
+                halves = await asyncio.gather(
+                    self._embed_batch(batch[:middle], semaphore),
+                    self._embed_batch(batch[middle:], semaphore)
                 )
-                
-                # Process response
-                for item, text, embedding_data in zip(batch, batch_texts, response.data):
-                    embeddings_data.append({
-                        "item_id": item.id,
-                        "embedding": embedding_data.embedding,
-                        "text": text
-                    })
-                
-                logger.debug(f"Processed batch of {len(batch)} items")
-            
-            logger.info(f"Successfully created embeddings for {len(embeddings_data)} items")
-            return embeddings_data
+                return halves[0] + halves[1]
+            except (RateLimitError, APIConnectionError, InternalServerError) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = min(2 ** attempt, 30) + random.random()
+                logger.warning(f"Embedding batch failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                self.progress["retries"] += 1
+                await asyncio.sleep(delay)
+
+        self.progress["done"] += len(batch)
+        logger.info(f"Embedded {self.progress['done']} items ({self.progress['scanned']} scanned)")
+
+        return [{
+            "item_id": entry["item_id"],
+            "embedding": embedding_data.embedding,
+            "text": entry["text"]
+        } for entry, embedding_data in zip(batch, response.data)]
+
+    async def _embed_stream(
+        self,
+        entries: AsyncIterable[Dict[str, Any]],
+        on_batch: Callable[[List[Dict[str, Any]]], Awaitable[None]]
+    ) -> int:
+        """
+        Embed {"item_id", "text"} entries as they are produced.
+
+        Batches are started while the input is still being read, with at most
+        a few batches queued beyond the concurrency limit. Each finished batch
+        is handed to on_batch, so nothing accumulates in memory.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        pending = set()
+        embedded = 0
+
+        async def finish(tasks):
+            nonlocal embedded
+            for task in tasks:
+                records = task.result()
+                await on_batch(records)
+                embedded += len(records)
+
+        try:
+            async for batch in self.make_batches(entries):
+                pending.add(asyncio.ensure_future(self._embed_batch(batch, semaphore)))
+                if len(pending) >= 2 * self.max_concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    await finish(done)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                await finish(done)
+        except Exception:
+            for task in pending:
+                task.cancel()
+            self.progress["state"] = "failed"
+            raise
+
+        return embedded
+
+    def _start_progress(self) -> None:
+        self.progress = {
+            "state": "running",
+            "scanned": 0,
+            "done": 0,
+            "retries": 0,
+            "started_at": datetime.utcnow().isoformat()
+        }
+
+    async def create_embeddings(self, store: InventoryVectorStore) -> int:
+        """
+        Create embeddings for all items, persisting them and adding them to `store`.
+
+        Each batch is written in its own short transaction once its embeddings
+        arrive; the writer connection is never held across an API call.
+        """
+        try:
+            self._start_progress()
+
+            async def entries():
+                async for row, text in self.iter_item_texts():
+                    self.progress["scanned"] += 1
+                    yield {"item_id": row.id, "text": text}
+
+            async def on_batch(records):
+                await run_in_session(self.save_embeddings, records)
+                store.upsert(records)
+
+            count = await self._embed_stream(entries(), on_batch)
+            await run_in_session(self.delete_orphaned_embeddings)
+
+            self.progress["state"] = "done"
+            logger.info(f"Successfully created embeddings for {count} items")
+            return count
             
         except Exception as e:
+            self.progress["state"] = "failed"
             logger.error(f"Error creating embeddings: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+    async def update_embeddings(
+        self,
+        store: InventoryVectorStore
+    ) -> Tuple[Dict[str, int], List[int]]:
+        """
+        Incrementally refresh persisted embeddings and patch `store` to match.
+
+        Only items that are new, whose embedded text changed, or that were
+        embedded with a different model are sent to the API. Items that were
+        modified without affecting their text only get their timestamp bumped,
+        and embeddings of deleted items are removed.
+
+        Returns the stats and the ids of all re-embedded or deleted items.
+        """
+        try:
+            self._start_progress()
+
+            # Only fetch bookkeeping columns, not the vectors themselves
+            def read_existing(db):
+                return {
+                    item_id: (self.content_hash(text), last_updated, model_version)
+                    for item_id, text, last_updated, model_version in db.query(
+                        ItemEmbedding.item_id,
+                        ItemEmbedding.text_content,
+                        ItemEmbedding.last_updated,
+                        ItemEmbedding.model_version
+                    )
+                }
+
+            existing = await run_in_read_session(read_existing)
+
+            touched = []
+            seen = set()
+            changed = []
+
+            async def stale_entries():
+                async for row, text in self.iter_item_texts():
+                    seen.add(row.id)
+                    self.progress["scanned"] += 1
+                    stored = existing.get(row.id)
+
+                    if (stored is None
+                            or stored[2] != self.embedding_model
+                            or stored[0] != self.content_hash(text)):
+                        yield {"item_id": row.id, "text": text}
+                    elif row.last_modified and (
+                            not stored[1] or row.last_modified > datetime.fromisoformat(stored[1])):
+                        touched.append(row.id)
+
+            async def on_batch(records):
+                await run_in_session(self.save_embeddings, records)
+                store.upsert(records)
+                changed.extend(record["item_id"] for record in records)
+
+            embedded = await self._embed_stream(stale_entries(), on_batch)
+
+            deleted = [item_id for item_id in existing if item_id not in seen]
+            gone = set(deleted)
+            gone.update(int(item_id) for item_id in store.ids if int(item_id) not in seen)
+            store.remove(gone)
+
+            if touched or deleted:
+                await run_in_session(self.mark_touched_and_deleted, touched, deleted)
+
+            stats = {
+                "embedded": embedded,
+                "touched": len(touched),
+                "deleted": len(gone),
+                "unchanged": len(seen) - embedded - len(touched)
+            }
+            self.progress["state"] = "done"
+            logger.info(f"Incremental embeddings refresh: {stats}")
+            return stats, changed + sorted(gone)
+
+        except Exception as e:
+            self.progress["state"] = "failed"
+            logger.error(f"Error updating embeddings: {str(e)}")
+            raise
+
+    def mark_touched_and_deleted(self, db: Session, touched: List[int], deleted: List[int]) -> None:
+        """Bump timestamps of items whose text didn't change and drop embeddings of deleted items"""
+        try:
+            timestamp = datetime.utcnow().isoformat()
+            for i in range(0, len(touched), self.write_chunk_size):
+                db.query(ItemEmbedding).filter(
+                    ItemEmbedding.item_id.in_(touched[i:i + self.write_chunk_size])
+                ).update({ItemEmbedding.last_updated: timestamp}, synchronize_session=False)
+            for i in range(0, len(deleted), self.write_chunk_size):
+                db.query(ItemEmbedding).filter(
+                    ItemEmbedding.item_id.in_(deleted[i:i + self.write_chunk_size])
+                ).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    def delete_orphaned_embeddings(self, db: Session) -> None:
+        """Drop embeddings of items that no longer exist"""
+        try:
+            db.query(ItemEmbedding).filter(
+                ItemEmbedding.item_id.not_in(select(StoredItem.id))
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    def save_embeddings(self, db: Session, embeddings_data: List[Dict[str, Any]]) -> None:
+        """Persist embeddings to the item_embeddings table as float32 blobs"""
+        try:
+            item_ids = [entry["item_id"] for entry in embeddings_data]
+            existing = {}
+            for i in range(0, len(item_ids), self.write_chunk_size):
+                for row in db.query(ItemEmbedding).filter(
+                    ItemEmbedding.item_id.in_(item_ids[i:i + self.write_chunk_size])
+                ):
+                    existing[row.item_id] = row
+            timestamp = datetime.utcnow().isoformat()
+
+            for entry in embeddings_data:
+                row = existing.get(entry["item_id"])
+                if row is None:
+                    row = ItemEmbedding(item_id=entry["item_id"])
+                    db.add(row)
+                row.set_vector(entry["embedding"])
+                row.text_content = entry["text"]
+                row.model_version = self.embedding_model
+                row.last_updated = timestamp
+
+            db.commit()
+            logger.debug(f"Persisted {len(embeddings_data)} embeddings")
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error saving embeddings: {str(e)}")
+            raise
+
+    def load_embeddings(self, db: Session) -> Iterator[Dict[str, Any]]:
+        """Stream persisted embeddings for the current model, one keyset page at a time"""
+        try:
+            query = db.query(
+                ItemEmbedding.item_id,
+                ItemEmbedding.embedding_vector,
+                ItemEmbedding.text_content
+            ).filter(
+                ItemEmbedding.model_version == self.embedding_model
+            )
+
+            loaded = 0
+            last_id = 0
+            while True:
+                rows = query.filter(
+                    ItemEmbedding.item_id > last_id
+                ).order_by(ItemEmbedding.item_id).limit(self.read_chunk_size).all()
+                if not rows:
+                    break
+                for item_id, vector, text in rows:
+                    if vector:
+                        loaded += 1
+                        yield {
+                            "item_id": item_id,
+                            "embedding": ItemEmbedding.decode_vector(vector),
+                            "text": text
+                        }
+                last_id = rows[-1].item_id
+
+            logger.info(f"Loaded {loaded} persisted embeddings")
+
+        except Exception as e:
+            logger.error(f"Error loading embeddings: {str(e)}")
+            raise
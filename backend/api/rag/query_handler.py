@@ -1,118 +1,208 @@
-from typing import List, Dict, Any
-import numpy as np
+from typing import List, Dict, Any, AsyncIterator, Tuple
 from openai import AsyncOpenAI
+from .vector_store import InventoryVectorStore
+from .cache import QueryEmbeddingCache, answer_cache
+import numpy as np
 import json
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
 class InventoryRAGHandler:
     def __init__(self, embedding_manager):
         self.embedding_manager = embedding_manager
-        self.async_client = AsyncOpenAI()
+        self._async_client = None  # Created on first use, so importing needs no API key
+        self.query_cache = QueryEmbeddingCache(
+            maxsize=int(os.getenv('RAG_QUERY_CACHE_SIZE', '1024')),
+            ttl=float(os.getenv('RAG_QUERY_CACHE_TTL', '86400'))
+        )
+        self.answer_cache = answer_cache
+        self.chat_model = "gpt-4-turbo-preview"
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI()
+        return self._async_client
+
+    async def embed_query(self, query: str) -> np.ndarray:
+        """Get the embedding for a query, reusing cached embeddings of repeated questions"""
+        model = self.embedding_manager.embedding_model
+        query_embedding = self.query_cache.get_embedding(query, model)
+        if query_embedding is not None:
+            logger.debug("Query embedding cache hit")
+            return query_embedding
+
+        query_embedding_resp = await self.async_client.embeddings.create(
+            input=query,
+            model=model
+        )
+        query_embedding = np.asarray(query_embedding_resp.data[0].embedding, dtype=np.float32)
+        self.query_cache.put_embedding(query, model, query_embedding)
+        return query_embedding
 
     async def find_relevant_items(
         self, 
         query: str, 
-        embeddings_data: List[Dict[str, Any]], 
-        top_k: int = 5
+        embeddings_data: InventoryVectorStore, 
+        top_k: int = 5,
+        query_embedding: np.ndarray = None
     ) -> List[Dict[str, Any]]:
         """Find most relevant items for a given query"""
         try:
             # Get query embedding
-            query_embedding_resp = await self.async_client.embeddings.create(
-                input=query,
-                model=self.embedding_manager.embedding_model
-            )
-            query_embedding = query_embedding_resp.data[0].embedding
+            if query_embedding is None:
+                query_embedding = await self.embed_query(query)
 
-            # Calculate similarities
-            similarities = []
-            for item_data in embeddings_data:
-                similarity = np.dot(query_embedding, item_data["embedding"])
-                similarities.append((similarity, item_data))
-
-            # Get top-k most similar items
-            similarities.sort(key=lambda x: x[0], reverse=True)
-            return [item_data for _, item_data in similarities[:top_k]]
+            # Score every item with a single matrix-vector product
+            return [{
+                "item_id": item_id,
+                "text": embeddings_data.texts[item_id],
+                "score": score
+            } for item_id, score in embeddings_data.search(query_embedding, top_k)]
 
         except Exception as e:
             logger.error(f"Error finding relevant items: {str(e)}")
             raise
 
+    def _build_messages(self, query: str, relevant_items: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Build the chat messages for a query and its retrieved items"""
+        # Create context from relevant items
+        context = "\n\n".join([item["text"] for item in relevant_items])
+        logger.debug(f"Created context of length {len(context)}")
+
+        system_prompt = """You are an inventory assistant. Answer questions about the inventory using the provided context.
+        Format your response as a JSON object with the following structure:
+        {
+            "answer": "Your natural language answer here",
+            "items": [
+                {
+                    "item_id": "The database ID of the item",
+                    "relevance": "Why this item is relevant to the query",
+                    "details": {
+                        "category": "Item category",
+                        "location": "Storage location (include shelf and container)",
+                        "technical_info": "Key technical details as a string"
+                    }
+                }
+            ]
+        }
+        Always include the exact database ID from the context in the item_id field.
+        Include only the most relevant items. Make sure the response is valid JSON."""
+
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"Context about the inventory:\n\n{context}\n\nQuestion: {query}"}
+        ]
+
+    def _parse_answer(self, content: str, relevant_items: List[Dict[str, Any]]) -> Dict:
+        """Parse the model's JSON answer and attach database IDs to its items"""
+        result = json.loads(content)
+
+        # Add database IDs to the response
+        for item in result.get('items', []):
+            # Find the corresponding item in relevant_items
+            for rel_item in relevant_items:
+                # Match based on text content
+                item_tech_info = str(item.get('details', {}).get('technical_info', '')).lower()
+                rel_item_text = str(rel_item.get('text', '')).lower()
+                
+                if item_tech_info in rel_item_text or rel_item_text in item_tech_info:
+                    item['item_id'] = rel_item['item_id']
+                    logger.debug(f"Matched item with database ID: {item['item_id']}")
+                    break
+            
+            # If no ID was found, log a warning
+            if not item.get('item_id'):
+                logger.warning(f"Could not find matching ID for item: {item}")
+
+        logger.debug(f"Got formatted answer: {result}")
+        return result
+
     async def query_inventory(self, query: str, relevant_items: List[Dict[str, Any]]) -> Dict:
         """Query the inventory using RAG"""
         try:
-            # Create context from relevant items
-            context = "\n\n".join([item["text"] for item in relevant_items])
-            logger.debug(f"Created context of length {len(context)}")
-
-            system_prompt = """You are an inventory assistant. Answer questions about the inventory using the provided context.
-            Format your response as a JSON object with the following structure:
-            {
-                "answer": "Your natural language answer here",
-                "items": [
-                    {
-                        "item_id": "The database ID of the item",
-                        "relevance": "Why this item is relevant to the query",
-                        "details": {
-                            "category": "Item category",
-                            "location": "Storage location (include shelf and container)",
-                            "technical_info": "Key technical details as a string"
-                        }
-                    }
-                ]
-            }
-            Always include the exact database ID from the context in the item_id field.
-            Include only the most relevant items. Make sure the response is valid JSON."""
-
             # Use async client for chat completion
             response = await self.async_client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Context about the inventory:\n\n{context}\n\nQuestion: {query}"}
-                ],
+                model=self.chat_model,
+                messages=self._build_messages(query, relevant_items),
                 response_format={"type": "json_object"}
             )
 
-            result = json.loads(response.choices[0].message.content)
-            
-            # Add database IDs to the response
-            for item in result.get('items', []):
-                # Find the corresponding item in relevant_items
-                for rel_item in relevant_items:
-                    # Match based on text content
-                    item_tech_info = str(item.get('details', {}).get('technical_info', '')).lower()
-                    rel_item_text = str(rel_item.get('text', '')).lower()
-                    
-                    if item_tech_info in rel_item_text or rel_item_text in item_tech_info:
-                        item['item_id'] = rel_item['item_id']
-                        logger.debug(f"Matched item with database ID: {item['item_id']}")
-                        break
-                
-                # If no ID was found, log a warning
-                if not item.get('item_id'):
-                    logger.warning(f"Could not find matching ID for item: {item}")
-
-            logger.debug(f"Got formatted answer: {result}")
-            return result
+            return self._parse_answer(response.choices[0].message.content, relevant_items)
 
         except Exception as e:
             logger.error(f"Error querying inventory: {str(e)}")
             raise
 
-    async def get_answer(self, query: str, embeddings_data: List[Dict[str, Any]]) -> Dict:
+    async def get_answer(self, query: str, embeddings_data: InventoryVectorStore) -> Dict:
         """Get a complete answer for a query"""
         try:
             # Find relevant items
-            relevant_items = await self.find_relevant_items(query, embeddings_data)
+            query_embedding = await self.embed_query(query)
+            relevant_items = await self.find_relevant_items(
+                query, embeddings_data, query_embedding=query_embedding
+            )
             logger.debug(f"Found {len(relevant_items)} relevant items")
 
+            # Reuse the answer if the same question retrieved the same items
+            item_ids = [item["item_id"] for item in relevant_items]
+            result = self.answer_cache.get_answer(query, item_ids, query_embedding)
+            if result is not None:
+                logger.debug("Answer cache hit")
+                return result
+
             # Get formatted response
             result = await self.query_inventory(query, relevant_items)
+            self.answer_cache.put_answer(query, item_ids, result, query_embedding)
             return result
 
         except Exception as e:
             logger.error(f"Error getting answer: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+    async def stream_answer(
+        self,
+        query: str,
+        embeddings_data: InventoryVectorStore
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Answer a query incrementally.
+
+        Yields ("items", retrieved items) as soon as retrieval finishes, then
+        ("token", text) for each chunk of the model output, then ("result",
+        parsed answer) once the completion is done.
+        """
+        query_embedding = await self.embed_query(query)
+        relevant_items = await self.find_relevant_items(
+            query, embeddings_data, query_embedding=query_embedding
+        )
+        yield "items", relevant_items
+
+        item_ids = [item["item_id"] for item in relevant_items]
+        result = self.answer_cache.get_answer(query, item_ids, query_embedding)
+        if result is not None:
+            logger.debug("Answer cache hit")
+            yield "result", result
+            return
+
+        stream = await self.async_client.chat.completions.create(
+            model=self.chat_model,
+            messages=self._build_messages(query, relevant_items),
+            response_format={"type": "json_object"},
+            stream=True
+        )
+
+        chunks = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                chunks.append(delta)
+                yield "token", delta
+
+        result = self._parse_answer("".join(chunks), relevant_items)
+        self.answer_cache.put_answer(query, item_ids, result, query_embedding)
+        yield "result", result
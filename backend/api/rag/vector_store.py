@@ -0,0 +1,179 @@
+from typing import List, Dict, Any, Iterable, Tuple, Optional
+import numpy as np
+import logging
+from .ann_index import IVFIndex
+
+logger = logging.getLogger(__name__)
+
+class InventoryVectorStore:
+    """
+    In-memory embedding store.
+
+    Vectors live in one contiguous float32 matrix with a parallel array of
+    item ids, so scoring a query is a single matrix-vector product.
+    An optional approximate index narrows the rows that get scored.
+    """
+
+    def __init__(self, dimensions: int = 0):
+        self.dimensions = dimensions
+        self._matrix = np.empty((0, dimensions), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._size = 0
+        # Row of each item id (-1 if absent); item ids are dense autoincrement keys
+        self._row_of = np.full(0, -1, dtype=np.int64)
+        self.texts: Dict[int, str] = {}
+        self.index: Optional[IVFIndex] = None
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]], chunk_size: int = 1024) -> "InventoryVectorStore":
+        """Build a store from {"item_id", "embedding", "text"} records, consumed in chunks"""
+        store = cls()
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                store.upsert(chunk)
+                chunk = []
+        store.upsert(chunk)
+        return store
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, item_id: int) -> bool:
+        return self._row(item_id) >= 0
+
+    def _row(self, item_id: int) -> int:
+        if 0 <= item_id < len(self._row_of):
+            return int(self._row_of[item_id])
+        return -1
+
+    def _set_row(self, item_id: int, row: int) -> None:
+        if item_id >= len(self._row_of):
+            grown = np.full(max(item_id + 1, 2 * len(self._row_of), 1024), -1, dtype=np.int64)
+            grown[:len(self._row_of)] = self._row_of
+            self._row_of = grown
+        self._row_of[item_id] = row
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """View of the populated rows of the embedding matrix"""
+        return self._matrix[:self._size]
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Item ids, parallel to the rows of `matrix`"""
+        return self._ids[:self._size]
+
+    def _reserve(self, rows: int) -> None:
+        """Grow the backing arrays geometrically so appends stay amortised O(1)"""
+        if rows <= len(self._ids):
+            return
+        capacity = max(rows, 2 * len(self._ids), 64)
+        matrix = np.empty((capacity, self.dimensions), dtype=np.float32)
+        matrix[:self._size] = self.matrix
+        ids = np.empty(capacity, dtype=np.int64)
+        ids[:self._size] = self.ids
+        self._matrix, self._ids = matrix, ids
+
+    def upsert(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Insert new records and overwrite the vectors of existing ones"""
+        records = list(records)
+        if not records:
+            return
+
+        vectors = np.asarray([record["embedding"] for record in records], dtype=np.float32)
+        if self.dimensions == 0 and self._size == 0:
+            self.dimensions = vectors.shape[1]
+            self._matrix = np.empty((0, self.dimensions), dtype=np.float32)
+        if vectors.shape[1] != self.dimensions:
+            raise ValueError(
+                f"Embedding has {vectors.shape[1]} dimensions, store expects {self.dimensions}"
+            )
+
+        new_count = sum(1 for record in records if record["item_id"] not in self)
+        self._reserve(self._size + new_count)
+
+        for record, vector in zip(records, vectors):
+            item_id = record["item_id"]
+            row = self._row(item_id)
+            if row < 0:
+                row = self._size
+                self._set_row(item_id, row)
+                self._ids[row] = item_id
+                self._size += 1
+            self._matrix[row] = vector
+            self.texts[item_id] = record["text"]
+
+        if self.index is not None:
+            self.index.add([record["item_id"] for record in records], vectors)
+
+    def remove(self, item_ids: Iterable[int]) -> None:
+        """Remove items by moving the last row into each freed slot"""
+        item_ids = [int(item_id) for item_id in item_ids]
+        for item_id in item_ids:
+            row = self._row(item_id)
+            if row < 0:
+                continue
+            self._row_of[item_id] = -1
+            self.texts.pop(item_id, None)
+
+            last = self._size - 1
+            if row != last:
+                moved_id = int(self._ids[last])
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved_id
+                self._row_of[moved_id] = row
+            self._size -= 1
+
+        if self.index is not None:
+            self.index.remove(item_ids)
+
+    def attach_index(self, index: IVFIndex) -> None:
+        """
+        Route searches through an approximate index.
+
+        An untrained index is trained on the current vectors. A previously
+        saved index is brought in line with the store by inserting and
+        deleting the items that differ, without retraining.
+        """
+        if not index.is_trained:
+            index.train(self.matrix)
+
+        indexed = index.ids()
+        stale = indexed[~np.isin(indexed, self.ids)]
+        index.remove(stale.tolist())
+
+        missing = ~np.isin(self.ids, indexed)
+        if missing.any():
+            index.add(self.ids[missing].tolist(), self.matrix[missing])
+
+        self.index = index
+        logger.info(f"Attached IVF index ({len(stale)} removed, {int(missing.sum())} added)")
+
+    def get_vector(self, item_id: int) -> np.ndarray:
+        """Get the stored vector for an item"""
+        return self._matrix[self._row(item_id)]
+
+    def search(self, query_vector, top_k: int = 5, exact: bool = False) -> List[Tuple[int, float]]:
+        """Return (item_id, score) pairs for the top_k highest dot-product scores"""
+        if self._size == 0 or top_k <= 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        if self.index is not None and not exact:
+            rows = self._row_of[self.index.candidates(query)]
+            rows = rows[rows >= 0]
+            scores = self._matrix[rows] @ query
+        else:
+            rows = np.arange(self._size)
+            scores = self.matrix @ query
+
+        if top_k < len(scores):
+            # Partial selection, then order only the selected candidates
+            top = np.argpartition(scores, -top_k)[-top_k:]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(scores[top])[::-1]]
+
+        return [(int(self._ids[rows[i]]), float(scores[i])) for i in top]
@@ -3,6 +3,7 @@
 from quart import Blueprint, Quart
 from .inventory.item_routes import inventory_bp as inventory_items_bp
 from .inventory.search_routes import search_bp
+from .inventory.import_routes import import_bp
 from .storage_routes import storage_bp
 from .text_processing import text_processing_bp
 from .camera_routes import camera_bp
@@ -15,6 +16,7 @@ def register_routes(app: Quart):
     app.register_blueprint(storage_bp, url_prefix='/api/storage')
     app.register_blueprint(image_bp, url_prefix='/api/images')
     app.register_blueprint(search_bp, url_prefix='/api/inventory')
+    app.register_blueprint(import_bp, url_prefix='/api/inventory')
     app.register_blueprint(text_processing_bp, url_prefix='/api/text')
     app.register_blueprint(camera_bp, url_prefix='/api/camera')
     app.register_blueprint(data_management_bp, url_prefix='/api/data')
@@ -0,0 +1,37 @@
+# backend/api/routes/conditional.py
+
+from quart import Response, make_response, request
+import functools
+from database.version import current_version
+
+def versioned(view):
+    """
+    Conditional GET keyed on the persisted inventory version.
+
+    Answers If-None-Match / If-Modified-Since with 304 before the view (and
+    its queries) run, and tags successful responses with the version read
+    before the view started, so a write that lands mid-query makes the
+    next poll refetch rather than be missed.
+    """
+    @functools.wraps(view)
+    async def wrapper(*args, **kwargs):
+        etag, last_modified = await current_version()
+
+        if request.if_none_match:
+            # ETag wins when both are sent; Last-Modified has one-second resolution
+            current = request.if_none_match.contains(etag)
+        else:
+            current = request.if_modified_since is not None and last_modified <= request.if_modified_since
+
+        if current:
+            response = Response('', status=304)
+        else:
+            response = await make_response(await view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return wrapper
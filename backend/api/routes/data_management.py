@@ -3,6 +3,8 @@
 from flask import Blueprint, send_file, request, jsonify, current_app
 from sqlalchemy.exc import IntegrityError
 from database.db import SessionLocal, engine
+from database.migrations import run_migrations
+from database.version import bump_generation
 from api.models.storage import StorageLevel1, StorageLevel2, StorageLevel3, ContainerType
 from api.models.item import StoredItem
 import json
@@ -158,6 +160,9 @@ def restore_backup(zip_path):
             if not data.get('metadata', {}).get('type') == 'inventory_backup':
                 raise ValueError("Invalid backup file: incorrect format")
             
+            # The CLI may be the first to open a database the app hasn't upgraded yet
+            run_migrations(engine)
+            
             db = SessionLocal()
             try:
                 # Clear existing data
@@ -231,6 +236,8 @@ def restore_backup(zip_path):
                         if image_file.is_file():
                             shutil.copy2(image_file, UPLOAD_DIR / image_file.name)
                 
+                # Item ids are reused; in-memory indexes must rebuild rather than patch
+                bump_generation(db)
                 db.commit()
                 return True
                 
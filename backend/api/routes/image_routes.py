@@ -1,13 +1,15 @@
 # backend/api/routes/image_routes.py
 
-from flask import Blueprint, request, jsonify, current_app, send_from_directory
+from quart import Blueprint, request, jsonify, current_app, send_file
 from werkzeug.utils import secure_filename
 import os
 import sys
 import json
 from pathlib import Path
 import uuid
+import asyncio
 from llm.processors.image_processor import ImageProcessor
+from api.images.derivatives import DERIVATIVE_FORMATS, DerivativeError, derivative_path, ensure_derivative, resolve_original
 import logging
 
 # Add the backend directory to the Python path
@@ -50,15 +52,15 @@ async def upload_image():
         filepath = UPLOAD_DIR / filename
         
         current_app.logger.debug(f"Saving file to: {filepath}")
-        file.save(filepath)
+        await file.save(filepath)
         
         # Verify file was saved
         if not filepath.exists():
             raise Exception(f"Failed to save file at {filepath}")
         
-        # Process the image with the LLM
+        # Process the image with the LLM; other requests keep running meanwhile
         current_app.logger.info("Processing image with LLM")
-        classification = processor.process_image(str(filepath))
+        classification = await processor.process_image(str(filepath))
         
         # Add the image path to the classification
         classification['image_path'] = f'uploads/{filename}'
@@ -73,16 +75,17 @@ async def upload_image():
         return jsonify({'error': str(e)}), 500
 
 @image_bp.route('/raw-upload', methods=['POST'])
-def upload_raw_image():
+async def upload_raw_image():
     """Upload image without LLM processing"""
     try:
         current_app.logger.info("Processing raw image upload request")
         
-        if 'image' not in request.files:
+        files = await request.files
+        if 'image' not in files:
             current_app.logger.warning("No image file in request")
             return jsonify({'error': 'No image provided'}), 400
         
-        file = request.files['image']
+        file = files['image']
         if file.filename == '':
             current_app.logger.warning("Empty filename received")
             return jsonify({'error': 'No selected file'}), 400
@@ -92,7 +95,7 @@ def upload_raw_image():
         filepath = UPLOAD_DIR / filename
         
         current_app.logger.debug(f"Saving file to: {filepath}")
-        file.save(filepath)
+        await file.save(filepath)
         
         # Verify file was saved
         if not filepath.exists():
@@ -115,9 +118,48 @@ def upload_raw_image():
 async def serve_image(filename):
     try:
         return await send_file(
-            Path(current_app.config['UPLOAD_FOLDER']) / filename,
+            UPLOAD_DIR / filename,
             mimetype='image/jpeg'
         )
     except Exception as e:
         logger.error(f"Error serving image: {str(e)}")
-        return {'error': 'Image not found'}, 404
\ No newline at end of file
+        return {'error': 'Image not found'}, 404
+
+@image_bp.route('/derivatives/<size>/<path:image_path>')
+async def serve_derivative(size, image_path):
+    """
+    A resized variant of an uploaded image, e.g.
+    /api/images/derivatives/thumb/uploads/<name>.jpg?format=webp
+
+    Rendered on first request and stored next to the original. Upload names
+    are never reused, so responses are cacheable forever.
+    """
+    try:
+        fmt = request.args.get('format', 'webp')
+        original = resolve_original(UPLOAD_DIR, image_path)
+        if original is None:
+            return {'error': 'Image not found'}, 404
+
+        target = derivative_path(original, size, fmt)
+        if not target.exists():
+            target = await asyncio.to_thread(ensure_derivative, original, size, fmt)
+
+        response = await send_file(target, mimetype=DERIVATIVE_FORMATS[fmt][1])
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return await response.make_conditional(request)
+    except DerivativeError as e:
+        return {'error': str(e)}, 400
+    except Exception as e:
+        logger.error(f"Error serving image derivative {size}/{image_path}: {str(e)}")
+        return {'error': str(e)}, 500
+
+@image_bp.route('/status', methods=['GET'])
+async def get_status():
+    """Vision preprocessing: cache hits and bytes read vs. sent to the model"""
+    return {
+        "vision_preprocessing": {
+            "max_edge": processor.preprocessor.max_edge,
+            "jpeg_quality": processor.preprocessor.quality,
+            **processor.preprocessor.stats()
+        }
+    }
@@ -0,0 +1,262 @@
+# backend/api/routes/inventory/import_routes.py
+
+from quart import Blueprint, request
+from sqlalchemy import insert
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import codecs
+import collections
+import csv
+import json
+import logging
+import os
+import time
+from database.write_queue import write_queue
+from api.models.item import StoredItem
+from api.search.trigram import model_index
+from api.storage.hierarchy import storage_hierarchy
+
+import_bp = Blueprint('inventory_import', __name__)
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '1000'))
+MAX_REPORTED_ERRORS = 500
+
+ITEM_FIELDS = ('category', 'subcategory', 'brand', 'model', 'condition', 'image_path')
+
+class RowError(ValueError):
+    """A row that can't be imported; reported back with its row number"""
+
+def build_item_row(record: Dict[str, Any], locations) -> Dict[str, Any]:
+    """Validate one parsed record and turn it into stored_items column values"""
+    row = {}
+    for field in ITEM_FIELDS:
+        value = record.get(field)
+        if value is not None and not isinstance(value, str):
+            value = str(value)
+        row[field] = (value.strip() or None) if value is not None else None
+    if not row['category']:
+        raise RowError('category is required')
+
+    details = record.get('technical_details')
+    if isinstance(details, str):
+        details = details.strip()
+        try:
+            details = json.loads(details) if details else None
+        except json.JSONDecodeError:
+            raise RowError('technical_details is not valid JSON')
+    row['technical_details'] = details
+
+    row['shelf_id'] = row['container_id'] = None
+    shelf = str(record.get('shelf') or '').strip()
+    container = str(record.get('container') or '').strip()
+    if shelf:
+        if shelf not in locations:
+            raise RowError(f"Unknown shelf '{shelf}'")
+        row['shelf_id'], containers = locations[shelf]
+        if container:
+            if container not in containers:
+                raise RowError(f"Unknown container '{container}' on shelf '{shelf}'")
+            row['container_id'] = containers[container]
+    elif container:
+        raise RowError('container given without a shelf')
+    return row
+
+async def iter_lines(body) -> AsyncIterator[str]:
+    """Decode a streamed request body into lines (newlines kept) as chunks arrive"""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    async for chunk in body:
+        *lines, pending = (pending + decoder.decode(chunk)).split('\n')
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+class LineBuffer:
+    """
+    Lines received so far, as the input of one csv.reader that outlives them.
+
+    The reader asks for another line only while a record is unfinished, so
+    running dry during a record means it spans lines not yet received: the
+    record's lines go back into the buffer and are parsed again with more.
+    """
+
+    def __init__(self):
+        self.lines = collections.deque()
+        self.taken: List[str] = []  # Lines handed out for the current record
+        self.starved = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            self.starved = True
+            raise StopIteration
+        line = self.lines.popleft()
+        self.taken.append(line)
+        return line
+
+def read_buffered_records(reader, buffer: LineBuffer, final: bool = False):
+    """(raw text, values) for each complete record in the buffer"""
+    while True:
+        buffer.taken, buffer.starved = [], False
+        try:
+            values = next(reader, None)
+        except csv.Error as e:
+            raise RowError(f"Invalid CSV: {e}")
+        if not buffer.starved:
+            yield ''.join(buffer.taken), values
+        elif not buffer.taken:
+            return
+        elif final:
+            raise RowError('Unterminated quoted field at end of input')
+        else:
+            buffer.lines.extendleft(reversed(buffer.taken))
+            return
+
+async def iter_csv_records(body):
+    """CSV records as dicts keyed by the header row; quoted fields may span lines"""
+    header = None
+    buffer = LineBuffer()
+    reader = csv.reader(buffer)
+
+    def parse(final=False):
+        nonlocal header
+        for text, values in read_buffered_records(reader, buffer, final):
+            if not text.strip():
+                continue
+            if header is None:
+                header = [name.strip().lower() for name in values]
+                continue
+            yield dict(zip(header, values))
+
+    async for line in iter_lines(body):
+        buffer.lines.append(line)
+        for record in parse():
+            yield record
+    for record in parse(final=True):
+        yield record
+
+async def iter_ndjson_records(body):
+    async for line in iter_lines(body):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield RowError(f"Invalid JSON: {e.msg}")
+            continue
+        yield record if isinstance(record, dict) else RowError('Each line must be a JSON object')
+
+def insert_chunk(db, rows: List[Dict[str, Any]]) -> List[int]:
+    """One executemany INSERT for a chunk of rows; returns the new ids in row order"""
+    return db.execute(
+        insert(StoredItem).returning(StoredItem.id, sort_by_parameter_order=True),
+        rows
+    ).scalars().all()
+
+def index_rows(ids: List[int], rows: List[Dict[str, Any]]) -> None:
+    """Add committed rows to the model index; one that isn't built yet picks them up when it is"""
+    if model_index.loaded:
+        for item_id, row in zip(ids, rows):
+            model_index.add_item(item_id, row['brand'], row['model'])
+
+def detect_format(content_type: str, requested: Optional[str]) -> Optional[str]:
+    if requested:
+        return requested.lower()
+    if 'csv' in content_type:
+        return 'csv'
+    if 'ndjson' in content_type or 'jsonl' in content_type or 'x-json-stream' in content_type:
+        return 'ndjson'
+    return None
+
+@import_bp.route('/import', methods=['POST'])
+async def import_items():
+    """
+    Bulk-import items from a streamed CSV or NDJSON request body.
+
+    Columns/keys: category (required), subcategory, brand, model, condition,
+    technical_details (JSON), image_path, shelf and container (names).
+    Valid rows are inserted in chunks; invalid rows are reported by row
+    number and skipped.
+    """
+    try:
+        fmt = detect_format(request.content_type or '', request.args.get('format'))
+        if fmt not in ('csv', 'ndjson'):
+            return {'error': 'Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson'}, 400
+
+        started = time.perf_counter()
+        locations = (await storage_hierarchy.get_async()).locations
+        records = iter_csv_records(request.body) if fmt == 'csv' else iter_ndjson_records(request.body)
+
+        imported, failed, errors = 0, 0, []
+        chunk, chunk_rows = [], []
+
+        def record_error(row_number, message):
+            nonlocal failed
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({'row': row_number, 'error': message})
+
+        async def insert_rows(rows, numbers):
+            nonlocal imported
+            try:
+                ids = await write_queue.submit(insert_chunk, rows)
+            except Exception as e:
+                logger.error(f"Error importing rows {numbers[0]}-{numbers[-1]}: {str(e)}")
+                for number in numbers:
+                    record_error(number, f"Chunk insert failed: {str(e)}")
+                return
+            imported += len(ids)
+            # Trigram indexing of a large chunk is CPU work; keep it off the event loop
+            await asyncio.to_thread(index_rows, ids, rows)
+
+        # One chunk is inserted while the next is parsed
+        in_flight = None
+
+        async def flush():
+            nonlocal in_flight
+            rows, numbers = chunk[:], chunk_rows[:]
+            chunk.clear()
+            chunk_rows.clear()
+            if in_flight is not None:
+                await in_flight
+            in_flight = asyncio.ensure_future(insert_rows(rows, numbers))
+
+        row_number = 0
+        try:
+            async for record in records:
+                row_number += 1
+                try:
+                    if isinstance(record, RowError):
+                        raise record
+                    chunk.append(build_item_row(record, locations))
+                    chunk_rows.append(row_number)
+                except RowError as e:
+                    record_error(row_number, str(e))
+                    continue
+                if len(chunk) >= IMPORT_CHUNK_SIZE:
+                    await flush()
+        except RowError as e:
+            record_error(row_number + 1, str(e))
+        if chunk:
+            await flush()
+        if in_flight is not None:
+            await in_flight
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"Imported {imported} items ({failed} failed) in {elapsed:.2f}s")
+        return {
+            'imported': imported,
+            'failed': failed,
+            'errors': errors,
+            'errors_truncated': failed > len(errors),
+            'duration_ms': round(elapsed * 1000)
+        }
+
+    except Exception as e:
+        logger.error(f"Error importing items: {str(e)}")
+        return {'error': str(e)}, 500
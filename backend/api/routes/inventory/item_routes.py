@@ -1,22 +1,125 @@
 # backend/api/routes/inventory/item_routes.py
 
-from quart import Blueprint, request
+from quart import Blueprint, request, make_response
 import logging
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from database.db import SessionLocal
+from database.db import run_in_read_session
+from database.write_queue import write_queue
 from api.models.item import StoredItem
 from api.models.storage import StorageLevel1, StorageLevel2
+from api.rag.cache import answer_cache
+from api.search.trigram import model_index
+from api.routes.conditional import versioned
+from .pagination import CursorError, STREAM_FORMATS, page_params, fetch_page, stream_listing
+from .listing import listing_query, item_row_to_dict, item_row_to_summary, wants_details
 
 inventory_bp = Blueprint('inventory_items', __name__)
 logger = logging.getLogger(__name__)
 
+BULK_FILTER_FIELDS = ('category', 'subcategory', 'brand', 'condition', 'shelf_id', 'container_id')
+BULK_SET_FIELDS = ('category', 'condition', 'shelf_id', 'container_id')
+MAX_BULK_IDS = 20000  # Stays under SQLite's bound-parameter limit
+
+class BulkRequestError(ValueError):
+    """Raised for a malformed bulk update request"""
+
+def bulk_conditions(data):
+    """WHERE clauses for a bulk update from an id list and/or a column filter"""
+    conditions = []
+    ids = data.get('ids')
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(item_id, int) for item_id in ids):
+            raise BulkRequestError('ids must be a list of item ids')
+        if len(ids) > MAX_BULK_IDS:
+            raise BulkRequestError(f'At most {MAX_BULK_IDS} ids per request; use a filter instead')
+        conditions.append(StoredItem.id.in_(ids))
+
+    filters = data.get('filter') or {}
+    if not isinstance(filters, dict):
+        raise BulkRequestError('filter must be an object of field values')
+    unknown = set(filters) - set(BULK_FILTER_FIELDS)
+    if unknown:
+        raise BulkRequestError(f"Unknown filter fields: {', '.join(sorted(unknown))}")
+    for field, value in filters.items():
+        column = getattr(StoredItem, field)
+        conditions.append(column.is_(None) if value is None else column == value)
+
+    # Never touch the whole inventory by accident
+    if not conditions:
+        raise BulkRequestError('Give ids or a filter')
+    return conditions
+
+def bulk_values(db, changes):
+    """Column values for a bulk update; a move keeps shelf and container consistent"""
+    if not isinstance(changes, dict):
+        raise BulkRequestError('set must be an object of field values')
+    unknown = set(changes) - set(BULK_SET_FIELDS)
+    if unknown:
+        raise BulkRequestError(f"Unknown fields to set: {', '.join(sorted(unknown))}")
+    if not changes:
+        raise BulkRequestError('Nothing to set')
+
+    values = {field: changes[field] for field in ('category', 'condition') if field in changes}
+    if 'category' in values and not values['category']:
+        raise BulkRequestError('category cannot be empty')
+
+    if changes.get('container_id') is not None:
+        # The container determines the shelf
+        container = db.query(StorageLevel2).filter_by(id=changes['container_id']).first()
+        if not container:
+            raise BulkRequestError('Container not found')
+        if changes.get('shelf_id') not in (None, container.shelf_id):
+            raise BulkRequestError('Container is not on that shelf')
+        values['shelf_id'] = container.shelf_id
+        values['container_id'] = container.id
+    elif 'shelf_id' in changes:
+        if changes['shelf_id'] is not None and not db.query(StorageLevel1).filter_by(id=changes['shelf_id']).first():
+            raise BulkRequestError('Shelf not found')
+        values['shelf_id'] = changes['shelf_id']
+        values['container_id'] = None
+    elif 'container_id' in changes:
+        values['container_id'] = None  # Take items out of their container, keep the shelf
+    return values
+
+async def paginated_listing(build_query, serialize, extra=None):
+    """
+    Shared response logic for item listings.
+
+    ?stream=ndjson|json streams every matching item; ?limit= and/or
+    ?cursor= return one keyset page with a next_cursor; with neither the
+    full listing is returned as before.
+    """
+    order, limit, after = page_params(request.args)
+
+    fmt = request.args.get('stream')
+    if fmt:
+        if fmt not in STREAM_FORMATS:
+            return {'error': f"stream must be one of {', '.join(STREAM_FORMATS)}"}, 400
+        response = await make_response(
+            stream_listing(build_query, serialize, order, fmt),
+            {'Content-Type': STREAM_FORMATS[fmt]}
+        )
+        response.timeout = None
+        return response
+
+    def work(db):
+        if limit is None:
+            items = [serialize(item) for item in build_query(db).all()]
+            return {**(extra(items) if extra else {}), 'items': items}
+
+        rows, next_cursor = fetch_page(build_query(db), order, limit, after)
+        return {'items': [serialize(item) for item in rows], 'next_cursor': next_cursor}
+
+    return await run_in_read_session(work)
+
 @inventory_bp.route('/items', methods=['POST'])
 async def create_item():
     try:
         data = await request.get_json()
         logger.debug(f"Received item data: {data}")
         
-        with SessionLocal() as db:
+        def work(db):
             new_item = StoredItem(
                 category=data['category'],
                 subcategory=data.get('subcategory'),
@@ -41,20 +144,29 @@ async def create_item():
                         new_item.container_id = container.id
 
             db.add(new_item)
-            db.commit()
-            db.refresh(new_item)
+            db.flush()
             return new_item.to_dict()
 
+        item = await write_queue.submit(work)
+        # Only once committed: a failed group commit must not leave rolled-back ids indexed
+        model_index.add_item(item['id'], item['brand'], item['model'])
+        return item
+
     except Exception as e:
         logger.error(f"Error creating item: {str(e)}")
         return {'error': str(e)}, 500
 
 @inventory_bp.route('/items', methods=['GET'])
+@versioned
 async def get_items():
     try:
-        with SessionLocal() as db:
-            items = db.query(StoredItem).all()
-            return {'items': [item.to_dict() for item in items]}
+        include_details = wants_details(request.args, default=True)
+        return await paginated_listing(
+            lambda db: listing_query(db, include_details),
+            item_row_to_dict
+        )
+    except CursorError as e:
+        return {'error': str(e)}, 400
     except Exception as e:
         logger.error(f"Error getting items: {str(e)}")
         return {'error': str(e)}, 500
@@ -65,7 +177,7 @@ async def update_item(item_id):
         data = await request.get_json()
         logger.debug(f"Updating item {item_id} with data: {data}")
 
-        with SessionLocal() as db:
+        def work(db):
             item = db.query(StoredItem).filter_by(id=item_id).first()
             if not item:
                 return {'error': 'Item not found'}, 404
@@ -76,43 +188,87 @@ async def update_item(item_id):
                 if field in data:
                     setattr(item, field, data[field])
 
-            db.commit()
+            db.flush()
             return item.to_dict()
 
+        result = await write_queue.submit(work)
+        if not isinstance(result, tuple):  # (error, status) when the item doesn't exist
+            model_index.add_item(item_id, result['brand'], result['model'])
+        answer_cache.invalidate_items([item_id])
+        return result
+
     except Exception as e:
         logger.error(f"Error updating item: {str(e)}")
         return {'error': str(e)}, 400
 
+@inventory_bp.route('/items/bulk', methods=['POST'])
+async def bulk_update_items():
+    """
+    Move or update many items at once.
+
+    Body: {"ids": [...]} and/or {"filter": {"container_id": 3, ...}}, plus
+    {"set": {"shelf_id", "container_id", "category", "condition"}}. Runs as
+    one UPDATE in one transaction and returns the affected item count.
+    """
+    try:
+        data = await request.get_json()
+        logger.debug(f"Bulk update: {data}")
+        if not isinstance(data, dict):
+            return {'error': 'Expected a JSON object'}, 400
+
+        def work(db):
+            statement = update(StoredItem) \
+                .where(*bulk_conditions(data)) \
+                .values(**bulk_values(db, data.get('set') or {})) \
+                .returning(StoredItem.id)
+            return db.execute(statement, execution_options={'synchronize_session': False}).scalars().all()
+
+        item_ids = await write_queue.submit(work)
+        answer_cache.invalidate_items(item_ids)
+        return {'updated': len(item_ids), 'ids': item_ids}
+
+    except BulkRequestError as e:
+        return {'error': str(e)}, 400
+    except Exception as e:
+        logger.error(f"Error bulk updating items: {str(e)}")
+        return {'error': str(e)}, 500
+
 @inventory_bp.route('/items/<int:item_id>', methods=['DELETE'])
 async def delete_item(item_id):
     try:
-        with SessionLocal() as db:
+        def work(db):
             item = db.query(StoredItem).filter_by(id=item_id).first()
             if not item:
                 return {'error': 'Item not found'}, 404
                 
             db.delete(item)
-            db.commit()
+            db.flush()
             return {'message': 'Item deleted successfully'}
+
+        result = await write_queue.submit(work)
+        if not isinstance(result, tuple):
+            model_index.remove_item(item_id)
+        answer_cache.invalidate_items([item_id])
+        return result
     except Exception as e:
         logger.error(f"Error deleting item: {str(e)}")
         return {'error': str(e)}, 400
 
 @inventory_bp.route('/items/<item_id>', methods=['GET'])
+@versioned
 async def get_item_details(item_id: str):
     """Get details for a specific item"""
     try:
-        with SessionLocal() as db:
+        def work(db):
             # Try to find the item by ID first
             try:
                 numeric_id = int(item_id)
                 item = db.query(StoredItem).filter_by(id=numeric_id).first()
             except ValueError:
-                # If not a numeric ID, try to find by model number or other identifiers
-                item = db.query(StoredItem).filter(
-                    (StoredItem.model == item_id) |
-                    (StoredItem.brand + '-' + StoredItem.model == item_id)
-                ).first()
+                # If not a numeric ID, look up the model number or brand-model key
+                model_index.ensure_loaded(db)
+                matches = model_index.exact(item_id)
+                item = db.query(StoredItem).filter_by(id=matches[0]).first() if matches else None
             
             if not item:
                 return {'error': 'Item not found'}, 404
@@ -145,43 +301,35 @@ async def get_item_details(item_id: str):
                 'last_modified': item.last_modified.isoformat() if item.last_modified else None
             }
 
+        return await run_in_read_session(work)
+
     except Exception as e:
         logger.error(f"Error getting item details: {str(e)}")
         return {'error': str(e)}, 500
 
 @inventory_bp.route('/list', methods=['GET'])  # Changed to a specific endpoint
+@versioned
 async def list_items():
     """Get a list of all items with optional filtering"""
     try:
-        with SessionLocal() as db:
-            # Start with base query
-            query = db.query(StoredItem)
-            
-            # Apply filters from query parameters
-            if request.args.get('category'):
-                query = query.filter(StoredItem.category == request.args.get('category'))
-            if request.args.get('subcategory'):
-                query = query.filter(StoredItem.subcategory == request.args.get('subcategory'))
-            if request.args.get('brand'):
-                query = query.filter(StoredItem.brand == request.args.get('brand'))
-            
-            # Execute query
-            items = query.all()
-            
-            return {
-                'total': len(items),
-                'items': [{
-                    'id': item.id,
-                    'category': item.category,
-                    'subcategory': item.subcategory,
-                    'brand': item.brand,
-                    'model': item.model,
-                    'storage': {
-                        'shelf': item.shelf.name if item.shelf else None,
-                        'container': item.container.name if item.container else None
-                    }
-                } for item in items]
-            }
+        # Read filters now; streamed responses build queries after the request context is gone
+        filters = {
+            field: request.args.get(field)
+            for field in ('category', 'subcategory', 'brand')
+            if request.args.get(field)
+        }
+
+        include_details = wants_details(request.args, default=False)
+
+        def build_query(db):
+            # Start with base query and apply filters from query parameters
+            return listing_query(db, include_details).filter(
+                *[getattr(StoredItem, field) == value for field, value in filters.items()]
+            )
+
+        return await paginated_listing(build_query, item_row_to_summary, lambda items: {'total': len(items)})
+    except CursorError as e:
+        return {'error': str(e)}, 400
     except Exception as e:
         logger.error(f"Error listing items: {str(e)}")
         return {'error': str(e)}, 500
@@ -0,0 +1,79 @@
+# backend/api/routes/inventory/listing.py
+
+from typing import Any, Dict
+from api.models.item import StoredItem
+from api.models.storage import StorageLevel1, StorageLevel2
+
+TRUE_VALUES = ('1', 'true', 'yes')
+
+def wants_details(args, default: bool) -> bool:
+    """Read the include_details query flag"""
+    value = args.get('include_details')
+    if value is None:
+        return default
+    return value.lower() in TRUE_VALUES
+
+def listing_query(db, include_details: bool = True):
+    """
+    Item columns plus shelf and container names in one outer-joined query.
+
+    Rows carry only what listings serialize; technical_details, the one
+    potentially large column, is left out unless asked for.
+    """
+    columns = [
+        StoredItem.id,
+        StoredItem.category,
+        StoredItem.subcategory,
+        StoredItem.brand,
+        StoredItem.model,
+        StoredItem.condition,
+        StoredItem.image_path,
+        StoredItem.date_added,
+        StoredItem.last_modified,
+        StorageLevel1.name.label('shelf_name'),
+        StorageLevel2.name.label('container_name')
+    ]
+    if include_details:
+        columns.append(StoredItem.technical_details)
+
+    return db.query(*columns) \
+        .outerjoin(StorageLevel1, StoredItem.shelf_id == StorageLevel1.id) \
+        .outerjoin(StorageLevel2, StoredItem.container_id == StorageLevel2.id)
+
+def item_row_to_dict(row) -> Dict[str, Any]:
+    """Same shape as StoredItem.to_dict, built from a listing_query row"""
+    data = {
+        'id': row.id,
+        'category': row.category,
+        'subcategory': row.subcategory,
+        'brand': row.brand,
+        'model': row.model,
+        'condition': row.condition,
+        'location': {
+            'shelf': row.shelf_name,
+            'container': row.container_name
+        },
+        'image_path': row.image_path,
+        'date_added': row.date_added.isoformat() if row.date_added else None,
+        'last_modified': row.last_modified.isoformat() if row.last_modified else None
+    }
+    if 'technical_details' in row._fields:
+        data['technical_details'] = row.technical_details
+    return data
+
+def item_row_to_summary(row) -> Dict[str, Any]:
+    """Compact shape used by /api/inventory/list"""
+    data = {
+        'id': row.id,
+        'category': row.category,
+        'subcategory': row.subcategory,
+        'brand': row.brand,
+        'model': row.model,
+        'storage': {
+            'shelf': row.shelf_name,
+            'container': row.container_name
+        }
+    }
+    if 'technical_details' in row._fields:
+        data['technical_details'] = row.technical_details
+    return data
@@ -0,0 +1,135 @@
+# backend/api/routes/inventory/pagination.py
+
+from typing import Any, AsyncIterator, Callable, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import and_, or_
+from database.db import run_in_read_session
+from api.models.item import StoredItem
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+STREAM_CHUNK_SIZE = 500
+
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json'
+}
+
+# 'id' pages oldest-first, 'last_modified' most-recently-changed first
+ORDERINGS = ('id', 'last_modified')
+
+class CursorError(ValueError):
+    """Raised for a malformed cursor, one issued for a different ordering, or bad page parameters"""
+
+def order_key(row, order: str) -> Tuple[Any, ...]:
+    """Keyset position of an item (ORM object or row with id and last_modified)"""
+    if order == 'last_modified':
+        return (row.last_modified, row.id)
+    return (row.id,)
+
+def encode_cursor(order: str, key: Tuple[Any, ...]) -> str:
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in key]
+    payload = json.dumps({'o': order, 'k': values}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str, order: str) -> Tuple[Any, ...]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload['o'] != order:
+            raise CursorError(f"Cursor was issued for order={payload['o']}")
+        if order == 'last_modified':
+            modified, item_id = payload['k']
+            return (datetime.fromisoformat(modified) if modified else None, int(item_id))
+        return (int(payload['k'][0]),)
+    except CursorError:
+        raise
+    except Exception:
+        raise CursorError('Invalid cursor')
+
+def apply_keyset(query, order: str, after: Optional[Tuple[Any, ...]] = None):
+    """Order a StoredItem query for keyset paging and skip past the `after` position"""
+    if order == 'last_modified':
+        # DESC puts NULL last_modified (legacy rows) at the end in SQLite
+        query = query.order_by(StoredItem.last_modified.desc(), StoredItem.id.desc())
+        if after is not None:
+            modified, item_id = after
+            if modified is None:
+                query = query.filter(StoredItem.last_modified.is_(None), StoredItem.id < item_id)
+            else:
+                query = query.filter(or_(
+                    StoredItem.last_modified < modified,
+                    StoredItem.last_modified.is_(None),
+                    and_(StoredItem.last_modified == modified, StoredItem.id < item_id)
+                ))
+        return query
+
+    query = query.order_by(StoredItem.id)
+    if after is not None:
+        query = query.filter(StoredItem.id > after[0])
+    return query
+
+def page_params(args):
+    """
+    Parse limit, cursor and order from the query string.
+
+    Returns (order, limit, after); limit is None when the client asked
+    for neither a limit nor a cursor, i.e. wants the unpaginated listing.
+    """
+    order = args.get('order', 'id')
+    if order not in ORDERINGS:
+        raise CursorError(f"order must be one of {', '.join(ORDERINGS)}")
+
+    cursor = args.get('cursor')
+    limit = args.get('limit', type=int)
+    if limit is None and not cursor:
+        return order, None, None
+
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    elif limit < 1:
+        raise CursorError('limit must be at least 1')
+    limit = min(limit, MAX_PAGE_SIZE)
+    after = decode_cursor(cursor, order) if cursor else None
+    return order, limit, after
+
+def fetch_page(query, order: str, limit: int, after=None):
+    """Run one keyset page; returns (rows, next_cursor or None)"""
+    rows = apply_keyset(query, order, after).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(order, order_key(rows[-1], order))
+
+async def stream_listing(
+    build_query: Callable, serialize: Callable, order: str, fmt: str
+) -> AsyncIterator[str]:
+    """
+    Serialize a whole listing chunk by chunk as NDJSON lines or as one
+    {"items": [...]} document. Each chunk is a keyset page read in its
+    own short session, so no cursor stays open between writes.
+    """
+    if fmt == 'json':
+        yield '{"items": ['
+    def read_chunk(db, after):
+        rows = apply_keyset(build_query(db), order, after).limit(STREAM_CHUNK_SIZE).all()
+        return [json.dumps(serialize(row)) for row in rows], (order_key(rows[-1], order) if rows else None)
+
+    after, first = None, True
+    while True:
+        chunk, after = await run_in_read_session(read_chunk, after)
+
+        if fmt == 'json':
+            if chunk:
+                yield ('' if first else ',') + ','.join(chunk)
+                first = False
+        else:
+            for line in chunk:
+                yield line + '\n'
+
+        if len(chunk) < STREAM_CHUNK_SIZE:
+            break
+    if fmt == 'json':
+        yield ']}'
@@ -1,33 +1,215 @@
 # backend/api/routes/inventory/search_routes.py
 
 from quart import Blueprint, request
+import asyncio
 import logging
-from sqlalchemy import or_
-from database.db import SessionLocal
+from sqlalchemy import or_, text
+from database.db import run_in_read_session
+from database import fts
 from api.models.item import StoredItem
+from api.search.trigram import model_index
+from api.search.fusion import reciprocal_rank_fusion
+from .listing import listing_query, item_row_to_dict
+from .. import rag as rag_routes
 
 search_bp = Blueprint('search', __name__)
 logger = logging.getLogger(__name__)
 
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 200
+DEFAULT_LOOKUP_LIMIT = 10
+MAX_LOOKUP_LIMIT = 50
+HYBRID_CANDIDATES = 50  # Results taken from each retriever before fusion
+
+def limit_param(args, default: int, maximum: int) -> int:
+    """?limit= clamped to 1..maximum; SQLite reads a negative LIMIT as no limit at all"""
+    limit = args.get('limit', type=int)
+    return max(1, min(default if limit is None else limit, maximum))
+
+def fts_search(db, query: str, limit: int):
+    """BM25-ranked full-text search; returns (item_id, rank, snippet) rows"""
+    match = fts.build_match_query(query)
+    if not match:
+        return []
+
+    weights = ', '.join(str(weight) for weight in fts.BM25_WEIGHTS)
+    return db.execute(text(
+        f"""SELECT rowid AS item_id,
+                   bm25({fts.FTS_TABLE}, {weights}) AS rank,
+                   snippet({fts.FTS_TABLE}, -1, '<mark>', '</mark>', '…', 12) AS snippet
+            FROM {fts.FTS_TABLE}
+            WHERE {fts.FTS_TABLE} MATCH :match
+            ORDER BY rank
+            LIMIT :limit"""
+    ), {'match': match, 'limit': limit}).all()
+
+def substring_search(db, query: str):
+    """Case-insensitive substring match, used where FTS5 is unavailable"""
+    return db.query(StoredItem).filter(
+        or_(
+            StoredItem.category.ilike(f'%{query}%'),
+            StoredItem.subcategory.ilike(f'%{query}%'),
+            StoredItem.brand.ilike(f'%{query}%'),
+            StoredItem.model.ilike(f'%{query}%')
+        )
+    )
+
+def rows_by_id(db, ids):
+    """Listing rows for the given item ids, in one query, keyed by id"""
+    if not ids:
+        return {}
+    return {row.id: row for row in listing_query(db).filter(StoredItem.id.in_(ids)).order_by(StoredItem.id)}
+
+def keyword_ranking(db, query: str, limit: int):
+    """Item ids ranked by keyword relevance, with FTS snippets where available"""
+    if not fts.fts_available:
+        rows = substring_search(db, query).with_entities(StoredItem.id).limit(limit)
+        return [row.id for row in rows], {}
+    hits = fts_search(db, query, limit)
+    return [hit.item_id for hit in hits], {hit.item_id: hit.snippet for hit in hits}
+
+async def vector_ranking(query: str, limit: int):
+    """Item ids ranked by embedding similarity; empty when embeddings aren't loaded"""
+    store = rag_routes.embeddings_data
+    if store is None or len(store) == 0:
+        return [], {}
+    query_embedding = await rag_routes.rag_handler.embed_query(query)
+    hits = store.search(query_embedding, limit)
+    return [item_id for item_id, _ in hits], dict(hits)
+
 @search_bp.route('/search', methods=['GET'])
 async def search_items():
     try:
-        query = request.args.get('q', '')
+        # The frontend sends ?query=, older clients ?q=
+        query = request.args.get('q') or request.args.get('query', '')
         if not query:
             return {'error': 'No search query provided'}, 400
 
-        with SessionLocal() as db:
-            items = db.query(StoredItem).filter(
-                or_(
-                    StoredItem.category.ilike(f'%{query}%'),
-                    StoredItem.subcategory.ilike(f'%{query}%'),
-                    StoredItem.brand.ilike(f'%{query}%'),
-                    StoredItem.model.ilike(f'%{query}%')
-                )
-            ).all()
-            
-            return {'items': [item.to_dict() for item in items]}
-            
+        limit = limit_param(request.args, DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT)
+
+        def work(db):
+            if not fts.fts_available:
+                ids = [row.id for row in substring_search(db, query).with_entities(StoredItem.id).limit(limit)]
+                return {'items': [item_row_to_dict(row) for row in rows_by_id(db, ids).values()]}
+
+            hits = fts_search(db, query, limit)
+            items = rows_by_id(db, [hit.item_id for hit in hits])
+
+            results = []
+            for hit in hits:
+                item = items.get(hit.item_id)
+                if item is None:
+                    continue
+                result = item_row_to_dict(item)
+                result['rank'] = hit.rank
+                result['snippet'] = hit.snippet
+                results.append(result)
+
+            return {'items': results}
+
+        return await run_in_read_session(work)
+
     except Exception as e:
         logger.error(f"Error searching items: {str(e)}")
         return {'error': str(e)}, 500
+
+@search_bp.route('/lookup', methods=['GET'])
+async def lookup_items():
+    """Fuzzy lookup by model number or brand-model key, e.g. from a scanned label"""
+    try:
+        query = request.args.get('q', '')
+        if not query:
+            return {'error': 'No lookup query provided'}, 400
+
+        limit = limit_param(request.args, DEFAULT_LOOKUP_LIMIT, MAX_LOOKUP_LIMIT)
+        min_score = request.args.get('min_score', 0.3, type=float)
+
+        def work(db):
+            model_index.ensure_loaded(db)
+            matches = model_index.search(query, limit=limit, min_score=min_score)
+            rows = {
+                row.id: row
+                for row in db.query(
+                    StoredItem.id, StoredItem.category, StoredItem.brand, StoredItem.model
+                ).filter(StoredItem.id.in_([item_id for item_id, _, _ in matches]))
+            }
+
+            candidates = []
+            for item_id, score, key in matches:
+                row = rows.get(item_id)
+                if row is None:
+                    continue
+                candidates.append({
+                    'id': row.id,
+                    'category': row.category,
+                    'brand': row.brand,
+                    'model': row.model,
+                    'matched_key': key,
+                    'score': round(score, 4)
+                })
+
+            return {'query': query, 'candidates': candidates}
+
+        return await run_in_read_session(work)
+
+    except Exception as e:
+        logger.error(f"Error looking up items: {str(e)}")
+        return {'error': str(e)}, 500
+
+@search_bp.route('/search/hybrid', methods=['GET'])
+async def hybrid_search():
+    """Keyword and vector search run concurrently, merged by reciprocal rank fusion"""
+    try:
+        query = request.args.get('q') or request.args.get('query', '')
+        if not query:
+            return {'error': 'No search query provided'}, 400
+
+        limit = limit_param(request.args, DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT)
+        candidates = max(limit, HYBRID_CANDIDATES)
+
+        keyword, vector = await asyncio.gather(
+            run_in_read_session(keyword_ranking, query, candidates),
+            vector_ranking(query, candidates),
+            return_exceptions=True
+        )
+
+        # Either retriever may fail on its own; answer from whichever succeeded
+        sources = {}
+        for name, outcome in (('keyword', keyword), ('vector', vector)):
+            if isinstance(outcome, Exception):
+                logger.error(f"Hybrid search {name} retrieval failed: {str(outcome)}")
+                sources[name] = 'error'
+            else:
+                sources[name] = len(outcome[0])
+        if all(status == 'error' for status in sources.values()):
+            return {'error': 'Search unavailable'}, 500
+
+        keyword_ids, snippets = keyword if not isinstance(keyword, Exception) else ([], {})
+        vector_ids, similarities = vector if not isinstance(vector, Exception) else ([], {})
+        fused = reciprocal_rank_fusion([keyword_ids, vector_ids])[:limit]
+
+        keyword_ranks = {item_id: rank for rank, item_id in enumerate(keyword_ids, start=1)}
+        vector_ranks = {item_id: rank for rank, item_id in enumerate(vector_ids, start=1)}
+
+        def work(db):
+            items = rows_by_id(db, [item_id for item_id, _ in fused])
+
+            results = []
+            for item_id, score in fused:
+                item = items.get(item_id)
+                if item is None:
+                    continue
+                result = item_row_to_dict(item)
+                result['score'] = score
+                result['keyword_rank'] = keyword_ranks.get(item_id)
+                result['vector_rank'] = vector_ranks.get(item_id)
+                result['similarity'] = similarities.get(item_id)
+                result['snippet'] = snippets.get(item_id)
+                results.append(result)
+            return results
+
+        return {'items': await run_in_read_session(work), 'sources': sources}
+
+    except Exception as e:
+        logger.error(f"Error in hybrid search: {str(e)}")
+        return {'error': str(e)}, 500
@@ -1,8 +1,13 @@
-from quart import Blueprint, request
+from quart import Blueprint, request, make_response
+import asyncio
+import json
 import logging
-from database.db import SessionLocal
+import os
+from database.db import DB_PATH, run_in_read_session
 from ..rag.embeddings import InventoryEmbeddingManager
 from ..rag.query_handler import InventoryRAGHandler
+from ..rag.vector_store import InventoryVectorStore
+from ..rag.ann_index import IVFIndex
 from asgiref.sync import async_to_sync
 from functools import wraps
 from openai import OpenAIError
@@ -17,6 +22,52 @@ embeddings_data = None  # Start with no embeddings
 embedding_manager = InventoryEmbeddingManager()
 rag_handler = InventoryRAGHandler(embedding_manager)
 
+# Approximate nearest-neighbour index settings ('ivf' or 'none')
+ANN_INDEX_TYPE = os.getenv('RAG_ANN_INDEX', 'ivf')
+ANN_MIN_ITEMS = int(os.getenv('RAG_ANN_MIN_ITEMS', '20000'))  # Exact search is fast below this
+IVF_NLIST = int(os.getenv('RAG_IVF_NLIST', '0'))  # 0 = about 4 * sqrt(item count)
+IVF_NPROBE = int(os.getenv('RAG_IVF_NPROBE', '16'))
+ANN_INDEX_PATH = os.path.join(os.path.dirname(DB_PATH), 'inventory_ann.npz')
+
+# One refresh or reload at a time; they all replace or patch embeddings_data
+refresh_lock = asyncio.Lock()
+
+def save_ann_index(store: InventoryVectorStore):
+    """Write the store's ANN index next to the database, if it has one"""
+    if store.index is None:
+        return
+    try:
+        store.index.save(ANN_INDEX_PATH, tag=embedding_manager.embedding_model)
+    except Exception as e:
+        logger.error(f"Could not save ANN index: {str(e)}")
+
+async def load_vector_store() -> InventoryVectorStore:
+    """Build the store from persisted embeddings, reading on the DB executor"""
+    return await run_in_read_session(lambda db: build_vector_store(embedding_manager.load_embeddings(db)))
+
+def build_vector_store(records, retrain: bool = False) -> InventoryVectorStore:
+    """Build the in-memory store, attaching an ANN index for large inventories"""
+    return attach_ann_index(InventoryVectorStore.from_records(records), retrain)
+
+def attach_ann_index(store: InventoryVectorStore, retrain: bool = False) -> InventoryVectorStore:
+    """Give a store an ANN index if the inventory is large enough to need one"""
+    if ANN_INDEX_TYPE != 'ivf' or len(store) < ANN_MIN_ITEMS:
+        return store
+
+    index = None
+    if not retrain:
+        try:
+            index = IVFIndex.load(ANN_INDEX_PATH, tag=embedding_manager.embedding_model)
+        except Exception as e:
+            logger.error(f"Could not load ANN index, rebuilding: {str(e)}")
+    if index is None:
+        index = IVFIndex(nlist=IVF_NLIST, nprobe=IVF_NPROBE)
+    index.nprobe = IVF_NPROBE
+
+    store.attach_index(index)
+    save_ann_index(store)
+    return store
+
 def handle_errors(f):
     """Error handling decorator for RAG endpoints"""
     @wraps(f)
@@ -43,26 +94,72 @@ def handle_errors(f):
             }, 500
     return decorated_function
 
+@rag_bp.before_app_serving
+async def load_persisted_embeddings():
+    """Load embeddings stored in the database so RAG works right after startup"""
+    global embeddings_data
+
+    try:
+        loaded = await load_vector_store()
+        if len(loaded):
+            embeddings_data = loaded
+            logger.info(f"Loaded {len(embeddings_data)} embeddings at startup")
+        else:
+            logger.info("No persisted embeddings found; call /refresh-embeddings to build them")
+    except Exception as e:
+        # Startup must not fail just because embeddings are unavailable
+        logger.error(f"Could not load persisted embeddings: {str(e)}")
+
 @rag_bp.route('/status', methods=['GET'])
 @handle_errors
 async def get_status():
     """Get the current status of the RAG system"""
     return {
         "embeddings_initialized": embeddings_data is not None,
-        "item_count": len(embeddings_data) if embeddings_data is not None else 0
+        "item_count": len(embeddings_data) if embeddings_data is not None else 0,
+        "ann_index": {
+            "type": "ivf",
+            "nlist": embeddings_data.index.nlist,
+            "nprobe": embeddings_data.index.nprobe
+        } if embeddings_data is not None and embeddings_data.index is not None else None,
+        "query_embedding_cache": rag_handler.query_cache.stats(),
+        "answer_cache": rag_handler.answer_cache.stats()
     }
 
 @rag_bp.route('/refresh-embeddings', methods=['POST'])
 @handle_errors
 async def refresh_embeddings():
-    """Refresh all embeddings for the inventory"""
+    """Refresh embeddings for the inventory.
+
+    Pass ?mode=incremental to only re-embed new or changed items.
+    """
     global embeddings_data
-    
-    logger.info("Starting embeddings refresh")
-    
+
+    mode = request.args.get('mode', 'full')
+    logger.info(f"Starting embeddings refresh (mode={mode})")
+
+    if mode == 'incremental':
+        async with refresh_lock:
+            if embeddings_data is None:
+                embeddings_data = await load_vector_store()
+            # Patches the live store (and its ANN index) in place
+            stats, affected = await embedding_manager.update_embeddings(embeddings_data)
+            save_ann_index(embeddings_data)
+            rag_handler.answer_cache.invalidate_items(affected)
+        return {
+            "message": "Embeddings updated incrementally",
+            "item_count": len(embeddings_data),
+            **stats
+        }
+    if mode != 'full':
+        return {'error': f"Unknown refresh mode: {mode}"}, 400
+
     try:
-        with SessionLocal() as db:
-            embeddings_data = await embedding_manager.create_embeddings(db)
+        async with refresh_lock:
+            store = InventoryVectorStore()
+            await embedding_manager.create_embeddings(store)
+            embeddings_data = attach_ann_index(store, retrain=True)
+            rag_handler.answer_cache.clear()
             logger.info(f"Successfully refreshed embeddings for {len(embeddings_data)} items")
             return {
                 "message": "Embeddings refreshed successfully",
@@ -94,13 +191,56 @@ async def query_rag():
         logger.error(f"Error in query: {str(e)}")
         return {'error': str(e)}, 500
 
+def format_sse(event: str, data) -> str:
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@rag_bp.route('/query/stream', methods=['POST'])
+@handle_errors
+async def query_rag_stream():
+    """Stream a RAG answer as server-sent events.
+
+    Events: "items" with the retrieved items, "token" for each chunk of the
+    answer as it is generated, then "result" with the final structured answer.
+    """
+    if embeddings_data is None:
+        return {
+            "error": "Configuration error",
+            "message": "Embeddings not initialized. Please refresh embeddings first."
+        }, 400
+
+    data = await request.get_json()
+    query = data.get('query') if data else None
+    if not query:
+        return {'error': 'No query provided'}, 400
+
+    store = embeddings_data
+
+    async def generate():
+        try:
+            async for event, payload in rag_handler.stream_answer(query, store):
+                yield format_sse(event, payload)
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            logger.error(f"Error streaming answer: {str(e)}")
+            yield format_sse("error", {"error": str(e)})
+
+    response = await make_response(generate(), 200, {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    response.timeout = None  # Don't cut off long answers
+    return response
+
 @rag_bp.route('/embeddings/status', methods=['GET'])
 @handle_errors
 async def get_embeddings_status():
     """Get the current status of embeddings"""
     return {
         "loaded": embeddings_data is not None,
-        "count": len(embeddings_data) if embeddings_data else 0
+        "count": len(embeddings_data) if embeddings_data else 0,
+        "progress": embedding_manager.progress
     }
 
 @rag_bp.route('/embeddings/reload', methods=['POST'])
@@ -108,9 +248,12 @@ async def get_embeddings_status():
 async def reload_embeddings():
     """Reload all embeddings"""
     try:
-        with SessionLocal() as db:
-            global embeddings_data
-            embeddings_data = await embedding_manager.create_embeddings(db)
+        global embeddings_data
+        async with refresh_lock:
+            store = InventoryVectorStore()
+            await embedding_manager.create_embeddings(store)
+            embeddings_data = attach_ann_index(store, retrain=True)
+            rag_handler.answer_cache.clear()
             return {
                 "status": "success",
                 "message": f"Successfully loaded {len(embeddings_data)} embeddings"
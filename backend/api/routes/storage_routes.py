@@ -1,10 +1,15 @@
 # backend/api/routes/storage_routes.py
 
-from flask import Blueprint, request, jsonify, current_app
+from quart import Blueprint, Response, request
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from database.db import SessionLocal
+from database.db import SessionLocal, run_in_read_session
+from database.write_queue import write_queue
 from api.models.storage import StorageLevel1, StorageLevel2, StorageLevel3, ContainerType
+from api.models.item import StoredItem
+from api.rag.cache import answer_cache
+from api.storage.hierarchy import storage_hierarchy
+from api.routes.conditional import versioned
 import logging
 
 storage_bp = Blueprint('storage', __name__)
@@ -17,31 +22,42 @@ def get_db():
     finally:
         db.close()
 
+def location_item_ids(db, **location):
+    """Ids of the items stored in a shelf or container"""
+    return [item_id for item_id, in db.query(StoredItem.id).filter_by(**location)]
+
+async def invalidate_cached_answers(**location):
+    """Drop cached RAG answers built from items stored in a changed location"""
+    answer_cache.invalidate_items(await run_in_read_session(location_item_ids, **location))
 
 @storage_bp.route('/level1/<int:shelf_id>', methods=['PUT'])
 async def update_shelf(shelf_id):
     try:
         data = await request.get_json()
         logger.debug(f"Updating shelf {shelf_id} with data: {data}")
-        
-        with SessionLocal() as db:
+
+        def work(db):
             shelf = db.query(StorageLevel1).filter_by(id=shelf_id).first()
             if not shelf:
                 return {'error': 'Shelf not found'}, 404
-                
+
             if 'name' in data:
                 if data['name'] != shelf.name:
                     existing = db.query(StorageLevel1).filter_by(name=data['name']).first()
                     if existing:
                         return {'error': 'A shelf with this name already exists'}, 400
                 shelf.name = data['name']
-                
+
             if 'description' in data:
                 shelf.description = data['description']
-                
-            db.commit()
+
+            db.flush()
             return shelf.to_dict()
-            
+
+        result = await write_queue.submit(work)
+        await invalidate_cached_answers(shelf_id=shelf_id)
+        return result
+
     except Exception as e:
         logger.error(f"Error updating shelf: {str(e)}")
         return {'error': str(e)}, 400
@@ -51,22 +67,26 @@ async def update_container(container_id):
     try:
         data = await request.get_json()
         logger.debug(f"Updating container {container_id} with data: {data}")
-        
-        with SessionLocal() as db:
+
+        def work(db):
             container = db.query(StorageLevel2).filter_by(id=container_id).first()
             if not container:
                 return {'error': 'Container not found'}, 404
-                
+
             if 'name' in data:
                 container.name = data['name']
             if 'description' in data:
                 container.description = data['description']
             if 'containerType' in data:
                 container.container_type = ContainerType(data['containerType'])
-                
-            db.commit()
+
+            db.flush()
             return container.to_dict()
-            
+
+        result = await write_queue.submit(work)
+        await invalidate_cached_answers(container_id=container_id)
+        return result
+
     except Exception as e:
         logger.error(f"Error updating container: {str(e)}")
         return {'error': str(e)}, 400
@@ -74,15 +94,21 @@ async def update_container(container_id):
 @storage_bp.route('/level1/<int:shelf_id>', methods=['DELETE'])
 async def delete_shelf(shelf_id):
     try:
-        with SessionLocal() as db:
+        # Collect the affected items first; deleting the shelf unlinks them
+        await invalidate_cached_answers(shelf_id=shelf_id)
+
+        def work(db):
             shelf = db.query(StorageLevel1).filter_by(id=shelf_id).first()
             if not shelf:
                 return {'error': 'Shelf not found'}, 404
-                
+
             db.delete(shelf)
-            db.commit()
+            db.flush()
             return {'message': 'Shelf deleted successfully'}
-            
+
+        result = await write_queue.submit(work)
+        return result
+
     except Exception as e:
         logger.error(f"Error deleting shelf: {str(e)}")
         return {'error': str(e)}, 400
@@ -90,15 +116,21 @@ async def delete_shelf(shelf_id):
 @storage_bp.route('/level2/<int:container_id>', methods=['DELETE'])
 async def delete_container(container_id):
     try:
-        with SessionLocal() as db:
+        # Collect the affected items first; deleting the container unlinks them
+        await invalidate_cached_answers(container_id=container_id)
+
+        def work(db):
             container = db.query(StorageLevel2).filter_by(id=container_id).first()
             if not container:
                 return {'error': 'Container not found'}, 404
-                
+
             db.delete(container)
-            db.commit()
+            db.flush()
             return {'message': 'Container deleted successfully'}
-            
+
+        result = await write_queue.submit(work)
+        return result
+
     except Exception as e:
         logger.error(f"Error deleting container: {str(e)}")
         return {'error': str(e)}, 400
@@ -108,22 +140,25 @@ async def delete_container(container_id):
 async def create_shelf():
     try:
         data = await request.get_json()
-        with SessionLocal() as db:
+
+        def work(db):
             shelf = StorageLevel1(name=data['name'])
             db.add(shelf)
-            db.commit()
-            db.refresh(shelf)
+            db.flush()
             return shelf.to_dict()
+
+        result = await write_queue.submit(work)
+        return result
     except Exception as e:
         logger.error(f"Error creating shelf: {str(e)}")
         return {'error': str(e)}, 500
 
 @storage_bp.route('/level1', methods=['GET'])
+@versioned
 async def get_shelves():
     try:
-        with SessionLocal() as db:
-            shelves = db.query(StorageLevel1).all()
-            return {'shelves': [shelf.to_dict() for shelf in shelves]}
+        snapshot = await storage_hierarchy.get_async()
+        return {'shelves': [shelf['level1'] for shelf in snapshot.shelves]}
     except Exception as e:
         logger.error(f"Error fetching shelves: {str(e)}")
         return {'error': str(e)}, 500
@@ -133,18 +168,21 @@ async def get_shelves():
 async def create_container():
     try:
         data = await request.get_json()
-        with SessionLocal() as db:
+
+        def work(db):
             new_container = StorageLevel2(
                 shelf_id=data['shelfId'],
                 name=data['name'],
                 container_type=ContainerType(data['containerType']),
                 description=data.get('description')
             )
-            
+
             db.add(new_container)
-            db.commit()
-            db.refresh(new_container)
+            db.flush()
             return new_container.to_dict()
+
+        result = await write_queue.submit(work)
+        return result
     except Exception as e:
         logger.error(f"Error creating container: {str(e)}")
         return {'error': str(e)}, 400
@@ -153,17 +191,19 @@ async def create_container():
 async def create_compartment():
     try:
         data = await request.get_json()
-        with SessionLocal() as db:
+
+        def work(db):
             new_compartment = StorageLevel3(
                 container_id=data['containerId'],
                 name=data['name'],
                 description=data.get('description')
             )
-            
+
             db.add(new_compartment)
-            db.commit()
-            db.refresh(new_compartment)
+            db.flush()
             return new_compartment.to_dict()
+
+        return await write_queue.submit(work)
     except Exception as e:
         logger.error(f"Error creating compartment: {str(e)}")
         return {'error': str(e)}, 400
@@ -171,23 +211,17 @@ async def create_compartment():
 # Add route to get full storage hierarchy
 @storage_bp.route('/hierarchy', methods=['GET'])
 async def get_hierarchy():
-    """Get the full storage hierarchy"""
+    """Get the full storage hierarchy; answers If-None-Match with 304"""
     try:
-        with SessionLocal() as db:
-            shelves = db.query(StorageLevel1).all()
-            logger.debug(f"Found {len(shelves)} shelves in database")
-            if not shelves:
-                return {'message': 'No storage locations defined yet.'}, 404
-                
-            result = {
-                'shelves': [{
-                    'level1': shelf.to_dict(),
-                    'level2': [container.to_dict() for container in shelf.containers]
-                } for shelf in shelves]
-            }
-            logger.debug(f"Returning hierarchy: {result}")
-            return result
-            
+        snapshot = await storage_hierarchy.get_async()
+        if not snapshot.shelves:
+            return {'message': 'No storage locations defined yet.'}, 404
+
+        response = Response(snapshot.body, mimetype='application/json')
+        response.set_etag(snapshot.etag)
+        response.headers['Cache-Control'] = 'no-cache'  # Revalidate every time; cheap with the ETag
+        return await response.make_conditional(request)
+
     except Exception as e:
         logger.error(f"Error getting hierarchy: {str(e)}")
         return {'error': str(e)}, 500
@@ -0,0 +1,19 @@
+# backend/api/search/fusion.py
+
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+RRF_K = 60
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = RRF_K) -> List[Tuple[Hashable, float]]:
+    """
+    Merge ranked id lists by reciprocal rank fusion.
+
+    Each list contributes 1 / (k + rank) for every id it contains (rank is
+    1-based), so ids ranked well by several retrievers rise to the top
+    without having to calibrate their raw scores against each other.
+    """
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda entry: entry[1], reverse=True)
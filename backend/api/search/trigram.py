@@ -0,0 +1,156 @@
+# backend/api/search/trigram.py
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from collections import Counter, defaultdict
+import heapq
+import math
+import logging
+import re
+import threading
+from database.version import read_generation
+
+logger = logging.getLogger(__name__)
+
+_NON_ALNUM = re.compile(r'[^0-9A-Z]+')
+
+def normalize_key(value: str) -> str:
+    """Uppercase and drop everything but letters and digits ("LM 317-T" -> "LM317T")"""
+    return _NON_ALNUM.sub('', (value or '').upper())
+
+def trigrams(normalized: str) -> Set[str]:
+    """Trigrams of a normalized key, padded so short keys and prefixes still match"""
+    if not normalized:
+        return set()
+    padded = f"$${normalized}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TrigramIndex:
+    """
+    In-memory trigram index over part identifiers.
+
+    Each item is indexed under its model number and its brand + model key.
+    Lookups rank items by Jaccard similarity between the trigram sets of the
+    query and the best-matching key, which tolerates typos, missing spaces
+    and dropped suffixes ("LM317T" vs "LM 317").
+
+    Safe to use from the DB executor threads and the event loop at once.
+    """
+
+    def __init__(self, candidate_factor: int = 20):
+        self.candidate_factor = candidate_factor  # Candidates rescored per requested result
+        self.loaded = False
+        self.generation: Optional[int] = None  # Inventory generation the index was built from
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._item_keys: Dict[int, List[Tuple[str, Set[str]]]] = {}
+        self._exact: Dict[str, Set[int]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._item_keys)
+
+    @staticmethod
+    def item_keys(brand: Optional[str], model: Optional[str]) -> List[str]:
+        """Normalized lookup keys for an item"""
+        keys = []
+        if model:
+            keys.append(normalize_key(model))
+            if brand:
+                keys.append(normalize_key(f"{brand}{model}"))
+        return [key for key in dict.fromkeys(keys) if key]
+
+    def add_item(self, item_id: int, brand: Optional[str], model: Optional[str]) -> None:
+        """Index an item, replacing any keys it was indexed under before"""
+        keys = self.item_keys(brand, model)
+        entries = [(key, trigrams(key)) for key in keys]
+        with self._lock:
+            self.remove_item(item_id)
+            if not entries:
+                return
+            for key, grams in entries:
+                self._exact[key].add(item_id)
+                for gram in grams:
+                    self._postings[gram].add(item_id)
+            self._item_keys[item_id] = entries
+
+    def remove_item(self, item_id: int) -> None:
+        with self._lock:
+            entries = self._item_keys.pop(item_id, None)
+            if not entries:
+                return
+            for key, grams in entries:
+                ids = self._exact.get(key)
+                if ids is not None:
+                    ids.discard(item_id)
+                    if not ids:
+                        del self._exact[key]
+                for gram in grams:
+                    ids = self._postings.get(gram)
+                    if ids is not None:
+                        ids.discard(item_id)
+                        if not ids:
+                            del self._postings[gram]
+
+    def load(self, rows: Iterable[Tuple[int, Optional[str], Optional[str]]]) -> None:
+        """Rebuild the index from (item_id, brand, model) rows"""
+        with self._lock:
+            self._postings.clear()
+            self._item_keys.clear()
+            self._exact.clear()
+            for item_id, brand, model in rows:
+                self.add_item(item_id, brand, model)
+            self.loaded = True
+        logger.info(f"Built trigram index over {len(self)} items")
+
+    def ensure_loaded(self, db) -> None:
+        """Build the index on first use, and rebuild it after the inventory was replaced"""
+        generation = read_generation(db)
+        if self.loaded and self.generation == generation:
+            return
+        from api.models.item import StoredItem
+        with self._lock:
+            if not self.loaded or self.generation != generation:
+                self.load(db.query(StoredItem.id, StoredItem.brand, StoredItem.model))
+                self.generation = generation
+
+    def exact(self, value: str) -> List[int]:
+        """Ids of items whose model or brand + model normalizes to the same key"""
+        with self._lock:
+            return sorted(self._exact.get(normalize_key(value), ()))
+
+    def search(self, value: str, limit: int = 10, min_score: float = 0.3) -> List[Tuple[int, float, str]]:
+        """Rank items by similarity to `value`; returns (item_id, score, matched key)"""
+        query_grams = trigrams(normalize_key(value))
+        if not query_grams:
+            return []
+
+        with self._lock:
+            return self._search(query_grams, limit, min_score)
+
+    def _search(self, query_grams: Set[str], limit: int, min_score: float) -> List[Tuple[int, float, str]]:
+        # Jaccard >= min_score needs at least ceil(min_score * |q|) shared trigrams,
+        # so any match shares one of the |q| - that + 1 rarest; skip the common rest
+        postings = sorted((self._postings.get(gram, ()) for gram in query_grams), key=len)
+        required = max(1, math.ceil(min_score * len(query_grams)))
+        shared = Counter()
+        for ids in postings[:len(postings) - required + 1]:
+            shared.update(ids)
+
+        # Rescore only the most promising items
+        candidates = heapq.nlargest(limit * self.candidate_factor, shared.items(), key=lambda kv: kv[1])
+
+        results = []
+        for item_id, _ in candidates:
+            best_score, best_key = 0.0, ''
+            for key, grams in self._item_keys[item_id]:
+                common = len(query_grams & grams)
+                score = common / (len(query_grams) + len(grams) - common)
+                if score > best_score:
+                    best_score, best_key = score, key
+            if best_score >= min_score:
+                results.append((item_id, best_score, best_key))
+
+        results.sort(key=lambda result: (-result[1], result[0]))
+        return results[:limit]
+
+# Shared index of model numbers; item write paths keep it current
+model_index = TrigramIndex()
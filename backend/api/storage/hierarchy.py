@@ -0,0 +1,99 @@
+# backend/api/storage/hierarchy.py
+"""
+Shared in-memory snapshot of the shelf -> container hierarchy.
+
+The hierarchy is read on every image upload, text analysis, import and
+/api/storage/hierarchy request but changes rarely. The snapshot is built
+with two queries and kept while the persisted storage_version, bumped by
+triggers on the storage tables, is unchanged; each read checks it with a
+primary-key lookup, so changes from any process (storage routes, init,
+backup restore) are picked up. It carries everything its readers need
+precomputed: the API payload and its serialized body and ETag, the LLM
+prompt structure and the name -> id map.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import threading
+from database.db import ReadSessionLocal, run_in_read_session
+from database.version import read_storage_version
+from api.models.storage import StorageLevel1, StorageLevel2
+
+logger = logging.getLogger(__name__)
+
+class HierarchySnapshot:
+    """One immutable build of the hierarchy; treat every attribute as read-only"""
+
+    def __init__(self, version: int, shelves, containers):
+        self.version = version
+        by_shelf: Dict[int, List[StorageLevel2]] = {}
+        for container in containers:
+            by_shelf.setdefault(container.shelf_id, []).append(container)
+
+        # /api/storage/hierarchy payload
+        self.shelves = [{
+            'level1': shelf.to_dict(),
+            'level2': [container.to_dict() for container in by_shelf.get(shelf.id, [])]
+        } for shelf in shelves]
+        self.body = json.dumps({'shelves': self.shelves}).encode()
+        self.etag = f"{version}-{hashlib.sha1(self.body).hexdigest()[:12]}"
+
+        # Storage context for LLM location suggestions
+        self.structure = [{
+            "shelf_name": shelf.name,
+            "shelf_description": shelf.description,
+            "containers": [{
+                "name": container.name,
+                "type": container.container_type.value,
+                "description": container.description
+            } for container in by_shelf.get(shelf.id, [])]
+        } for shelf in shelves]
+
+        # {shelf name: (shelf id, {container name: container id})}
+        self.locations: Dict[str, Tuple[int, Dict[str, int]]] = {
+            shelf.name: (shelf.id, {container.name: container.id for container in by_shelf.get(shelf.id, [])})
+            for shelf in shelves
+        }
+
+class StorageHierarchy:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[HierarchySnapshot] = None
+        self.builds = 0
+
+    def load(self, db) -> HierarchySnapshot:
+        """Snapshot for the storage version the session sees, building it if storage changed"""
+        # Version first: a write landing before the queries only makes the next read rebuild
+        version = read_storage_version(db)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        shelves = db.query(StorageLevel1).order_by(StorageLevel1.id).all()
+        containers = db.query(StorageLevel2).order_by(StorageLevel2.id).all()
+        snapshot = HierarchySnapshot(version, shelves, containers)
+        with self._lock:
+            self.builds += 1
+            # A slower build of an older version must not replace a newer one
+            if self._snapshot is None or self._snapshot.version <= version:
+                self._snapshot = snapshot
+        logger.debug(f"Built storage hierarchy v{version}: {len(shelves)} shelves, {len(containers)} containers")
+        return snapshot
+
+    def get(self) -> HierarchySnapshot:
+        """Blocking accessor for synchronous callers"""
+        with ReadSessionLocal() as db:
+            return self.load(db)
+
+    async def get_async(self) -> HierarchySnapshot:
+        """Like get(), on the DB executor"""
+        return await run_in_read_session(self.load)
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {"version": snapshot.version if snapshot else None, "builds": self.builds}
+
+# Shared across routes and LLM processors
+storage_hierarchy = StorageHierarchy()
@@ -5,10 +5,16 @@ from quart_cors import cors
 from api.routes import register_routes
 from api.routes.storage_init import init_bp
 from api.routes.inventory.item_routes import inventory_bp as inventory_items_bp
+import asyncio
 import logging
 import sys
 from pathlib import Path
 from database.db import Base, engine
+from database.fts import ensure_search_index
+from database.migrations import run_migrations
+from database.statistics import refresh_statistics, refresh_statistics_periodically
+from database.write_queue import write_queue
+from llm.openai_client import close_http_client
 
 # Update logging configuration
 logging.basicConfig(
@@ -41,6 +47,9 @@ def create_app():
     
     # Create database tables
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    ensure_search_index(engine)
+    refresh_statistics(engine)
     
     # Define absolute paths
     BACKEND_DIR = Path(__file__).resolve().parent
@@ -66,6 +75,24 @@ def create_app():
         app.logger.error(f"Unhandled exception: {str(e)}", exc_info=True)
         return {"error": str(e), "type": type(e).__name__}, 500
 
+    @app.before_serving
+    async def start_statistics_refresh():
+        app.statistics_task = asyncio.create_task(refresh_statistics_periodically(engine))
+
+    @app.after_serving
+    async def flush_write_queue():
+        # Commit any writes still queued before the process exits
+        await write_queue.close()
+
+    @app.after_serving
+    async def stop_statistics_refresh():
+        app.statistics_task.cancel()
+        refresh_statistics(engine)
+
+    @app.after_serving
+    async def close_openai_pool():
+        await close_http_client()
+
     @app.route('/')
     async def home():
         return {"status": "ok", "message": "Inventory System API is running"}
@@ -0,0 +1,111 @@
+# backend/benchmarks/ann_recall.py
+"""
+Recall vs latency benchmark for the IVF index used by RAG retrieval.
+
+Compares IVFIndex search against exact brute-force search over the same
+vectors for a range of nprobe values. Uses synthetic clustered vectors by
+default, or the persisted embeddings with --from-db.
+
+    python benchmarks/ann_recall.py --items 200000 --nprobe 1 4 16 64
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(backend_dir))
+
+from api.rag.ann_index import IVFIndex
+from api.rag.vector_store import InventoryVectorStore
+
+
+def synthetic_vectors(count, dimensions, clusters, seed):
+    """Unit vectors drawn around random cluster centres, like real embeddings"""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dimensions)).astype(np.float32)
+    labels = rng.integers(0, clusters, count)
+    vectors = centres[labels] + 0.6 * rng.standard_normal((count, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def load_db_vectors():
+    """Vectors persisted in item_embeddings"""
+    from database.db import SessionLocal
+    from api.models.embedding import ItemEmbedding
+
+    with SessionLocal() as db:
+        rows = db.query(ItemEmbedding.item_id, ItemEmbedding.embedding_vector).all()
+    ids = np.asarray([item_id for item_id, _ in rows], dtype=np.int64)
+    vectors = np.stack([ItemEmbedding.decode_vector(blob) for _, blob in rows])
+    return ids, vectors
+
+
+def timed_search(store, queries, top_k, exact):
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        hits = store.search(query, top_k, exact=exact)
+        latencies.append(time.perf_counter() - start)
+        results.append({item_id for item_id, _ in hits})
+    return results, np.asarray(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='IVF index recall/latency benchmark')
+    parser.add_argument('--items', type=int, default=100000, help='Synthetic vector count')
+    parser.add_argument('--dimensions', type=int, default=1536)
+    parser.add_argument('--clusters', type=int, default=500, help='Synthetic data clusters')
+    parser.add_argument('--from-db', action='store_true', help='Use persisted embeddings instead')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--nlist', type=int, default=0, help='0 = about 4 * sqrt(items)')
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 8, 16, 32, 64])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.from_db:
+        ids, vectors = load_db_vectors()
+    else:
+        vectors = synthetic_vectors(args.items, args.dimensions, args.clusters, args.seed)
+        ids = np.arange(1, len(vectors) + 1, dtype=np.int64)
+    print(f"Vectors: {len(vectors)} x {vectors.shape[1]}")
+
+    store = InventoryVectorStore.from_records(
+        {"item_id": int(item_id), "embedding": vector, "text": ""}
+        for item_id, vector in zip(ids, vectors)
+    )
+
+    # Queries are perturbed copies of stored vectors
+    rng = np.random.default_rng(args.seed + 1)
+    queries = vectors[rng.choice(len(vectors), args.queries, replace=False)]
+    queries = queries + 0.3 * rng.standard_normal(queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    exact_results, exact_ms = timed_search(store, queries, args.top_k, exact=True)
+    print(f"{'exact':>10}  recall@{args.top_k}=1.000  "
+          f"p50={np.percentile(exact_ms, 50):7.2f} ms  p95={np.percentile(exact_ms, 95):7.2f} ms")
+
+    start = time.perf_counter()
+    index = IVFIndex(nlist=args.nlist, seed=args.seed)
+    store.attach_index(index)
+    print(f"IVF build: nlist={index.nlist}, {time.perf_counter() - start:.1f} s")
+
+    for nprobe in args.nprobe:
+        index.nprobe = nprobe
+        results, latency_ms = timed_search(store, queries, args.top_k, exact=False)
+        recall = np.mean([
+            len(found & expected) / len(expected)
+            for found, expected in zip(results, exact_results)
+        ])
+        print(f"{'nprobe=' + str(nprobe):>10}  recall@{args.top_k}={recall:.3f}  "
+              f"p50={np.percentile(latency_ms, 50):7.2f} ms  p95={np.percentile(latency_ms, 95):7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# backend/benchmarks/query_plans.py
+"""
+EXPLAIN QUERY PLAN check for the hot item and storage queries.
+
+Builds the same queries the routes run and fails (exit status 1) if any
+of them reads a table with a full scan instead of an index. Checks a
+scratch in-memory database built from the models by default, or the
+live inventory.db (after its migrations) with --from-db.
+
+    python benchmarks/query_plans.py --verbose
+"""
+
+import argparse
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(backend_dir))
+
+from database.db import Base, engine as live_engine
+from database.migrations import run_migrations
+from database.statistics import refresh_statistics
+from api.models.item import StoredItem
+from api.models.storage import StorageLevel1, StorageLevel2, StorageLevel3
+from api.models.embedding import ItemEmbedding
+from api.routes.inventory.listing import listing_query
+from api.routes.inventory.pagination import apply_keyset
+
+# "SCAN stored_items" reads every row; "SCAN t USING INDEX ..." walks an index in order
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+def hot_queries(db):
+    """(name, statement) pairs for the access paths the routes depend on"""
+    listing = listing_query(db, include_details=False)
+    modified = datetime(2024, 1, 1)
+    return [
+        ('list by category', listing.filter(StoredItem.category == 'Resistor')),
+        ('list by category+subcategory', listing.filter(
+            StoredItem.category == 'Resistor', StoredItem.subcategory == 'SMD')),
+        ('list by brand', listing.filter(StoredItem.brand == 'Yageo')),
+        ('lookup by brand+model', db.query(StoredItem.id).filter(
+            StoredItem.brand == 'Yageo', StoredItem.model == 'RC0603')),
+        ('page by last_modified', apply_keyset(listing, 'last_modified', (modified, 100)).limit(100)),
+        ('items on a shelf', db.query(StoredItem.id).filter_by(shelf_id=1)),
+        ('items in a container', db.query(StoredItem.id).filter_by(container_id=1)),
+        ('container by shelf+name', db.query(StorageLevel2).filter_by(shelf_id=1, name='Box 1')),
+        ('containers of a shelf', db.query(StorageLevel2).filter_by(shelf_id=1)),
+        ('compartments of a container', db.query(StorageLevel3).filter_by(container_id=1)),
+        ('shelf by name', db.query(StorageLevel1).filter_by(name='Shelf A')),
+        ('embedding of an item', db.query(ItemEmbedding).filter_by(item_id=1)),
+        ('bulk move out of a container', update(StoredItem)
+            .where(StoredItem.container_id == 1)
+            .values(container_id=2)),
+    ]
+
+
+def explain(conn, statement):
+    if hasattr(statement, 'statement'):  # ORM Query
+        statement = statement.statement
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    return [row[3] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fail if a hot query falls back to a full table scan')
+    parser.add_argument('--from-db', action='store_true', help='check the live inventory.db instead of a scratch schema')
+    parser.add_argument('--verbose', action='store_true', help='print every plan, not just failures')
+    args = parser.parse_args()
+
+    # Same startup path as the app: create missing tables, migrate, refresh drifted statistics
+    engine = live_engine if args.from_db else create_engine('sqlite://')
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    refresh_statistics(engine)
+
+    failures = 0
+    with sessionmaker(bind=engine)() as db, engine.connect() as conn:
+        queries = hot_queries(db)
+        for name, statement in queries:
+            plan = explain(conn, statement)
+            scans = [step for step in plan if FULL_SCAN.match(step)]
+            failures += bool(scans)
+            if scans or args.verbose:
+                print(f"{'FAIL' if scans else 'ok  '} {name}")
+                for step in plan:
+                    print(f"       {step}")
+            if scans:
+                print(f"       full scan: {', '.join(scans)}")
+
+    print(f"{failures} of {len(queries)} queries scan a full table" if failures else 'No full table scans')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
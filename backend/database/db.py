@@ -1,6 +1,10 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import StaticPool, QueuePool
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
+import functools
 import os
 
 # Create a base class for declarative models
@@ -13,14 +17,80 @@ DB_PATH = os.path.join(BASE_DIR, 'inventory.db')
 # Create database engine with absolute path
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_PATH}"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool
-)
+# Engine profile: 'wal' (a pool of reader connections plus one serialized
+# writer) or 'single' (one shared connection, rollback journal)
+DB_PROFILE = os.getenv('DB_PROFILE', 'wal')
+DB_READ_POOL_SIZE = int(os.getenv('DB_READ_POOL_SIZE', str(max(2, os.cpu_count() or 1))))
+DB_WRITE_TIMEOUT = float(os.getenv('DB_WRITE_TIMEOUT', '30'))  # Seconds to wait for the writer
 
-# Create SessionLocal class
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),  # Durable at checkpoints in WAL mode
+    'cache_size': os.getenv('SQLITE_CACHE_SIZE', '-65536'),  # Negative = KiB, i.e. 64 MiB
+    'mmap_size': os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)),
+    'busy_timeout': os.getenv('SQLITE_BUSY_TIMEOUT', '5000'),  # Milliseconds
+    'foreign_keys': 'ON',
+    'temp_store': 'MEMORY'
+}
+
+def apply_pragmas(engine, read_only: bool = False):
+    """Set the profile's pragmas on every new connection of an engine"""
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+    return engine
+
+def use_explicit_transactions(engine, begin: str = 'BEGIN'):
+    """
+    Have SQLAlchemy, not the sqlite3 module, open transactions. The driver's
+    implicit BEGIN breaks SAVEPOINT, which the write queue relies on.
+    """
+    @event.listens_for(engine, "connect")
+    def disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def begin_transaction(conn):
+        conn.exec_driver_sql(begin)
+    return engine
+
+if DB_PROFILE == 'single':
+    engine = use_explicit_transactions(create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    ))
+    read_engine = engine
+else:
+    # Exactly one writer connection: write sessions queue for it instead of
+    # failing with "database is locked", and WAL lets readers run alongside it
+    # BEGIN IMMEDIATE takes the write lock up front, so other processes
+    # (backups, migrations) make it wait via busy_timeout rather than deadlock
+    engine = use_explicit_transactions(apply_pragmas(create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=DB_WRITE_TIMEOUT
+    )), begin='BEGIN IMMEDIATE')
+    read_engine = apply_pragmas(create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=DB_READ_POOL_SIZE,
+        max_overflow=0
+    ), read_only=True)
+
+# Create SessionLocal class; sessions that may write use the writer engine
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Read-only sessions from the reader pool
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 # Dependency to get DB session
 def get_db():
@@ -29,3 +99,33 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dedicated threads for database work so async handlers never block the event
+# loop on SQLite: enough for every reader plus the writer, or a single thread
+# when all sessions share one connection.
+DB_WORKERS = int(os.getenv('DB_WORKERS', '1' if DB_PROFILE == 'single' else str(DB_READ_POOL_SIZE + 1)))
+db_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix='db')
+
+async def run_db(fn, *args, **kwargs):
+    """Run a blocking database callable on the DB executor and await its result"""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    return await loop.run_in_executor(db_executor, call)
+
+async def run_in_session(fn, *args, **kwargs):
+    """
+    Async session dependency: call fn(db, *args, **kwargs) with a fresh
+    session on the DB executor. The session is closed before the result is
+    returned, so fn should return plain data rather than ORM objects.
+    """
+    def call():
+        with SessionLocal() as db:
+            return fn(db, *args, **kwargs)
+    return await run_db(call)
+
+async def run_in_read_session(fn, *args, **kwargs):
+    """Like run_in_session, but with a read-only session from the reader pool"""
+    def call():
+        with ReadSessionLocal() as db:
+            return fn(db, *args, **kwargs)
+    return await run_db(call)
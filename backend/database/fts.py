@@ -0,0 +1,100 @@
+# backend/database/fts.py
+"""
+SQLite FTS5 full-text index over stored items.
+
+stored_items_fts mirrors the searchable columns of stored_items, with
+technical_details flattened from JSON to plain text. Triggers on
+stored_items keep it in sync on insert, update and delete; the rowid of
+each FTS row is the item id.
+"""
+
+from sqlalchemy import text
+import logging
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'stored_items_fts'
+
+# Scalar values of the technical_details JSON, joined with spaces
+_FLATTEN_DETAILS = """CASE WHEN json_valid({col}) THEN (
+        SELECT group_concat(value, ' ') FROM json_tree({col})
+        WHERE type NOT IN ('object', 'array')
+    ) END"""
+
+def _fts_values(prefix: str) -> str:
+    return ", ".join([
+        f"{prefix}.category",
+        f"{prefix}.subcategory",
+        f"{prefix}.brand",
+        f"{prefix}.model",
+        _FLATTEN_DETAILS.format(col=f"{prefix}.technical_details")
+    ])
+
+FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        category, subcategory, brand, model, technical_details,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS stored_items_fts_insert AFTER INSERT ON stored_items BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, category, subcategory, brand, model, technical_details)
+        VALUES (NEW.id, {_fts_values('NEW')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS stored_items_fts_delete AFTER DELETE ON stored_items BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = OLD.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS stored_items_fts_update
+    AFTER UPDATE OF id, category, subcategory, brand, model, technical_details ON stored_items BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = OLD.id;
+        INSERT INTO {FTS_TABLE}(rowid, category, subcategory, brand, model, technical_details)
+        VALUES (NEW.id, {_fts_values('NEW')});
+    END""",
+]
+
+# Relative column weights for bm25(): category, subcategory, brand, model, technical_details
+BM25_WEIGHTS = (2.0, 2.0, 3.0, 5.0, 1.0)
+
+fts_available = False
+
+def rebuild_search_index(conn) -> None:
+    """Repopulate the FTS table from stored_items"""
+    conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    conn.execute(text(
+        f"""INSERT INTO {FTS_TABLE}(rowid, category, subcategory, brand, model, technical_details)
+        SELECT s.id, {_fts_values('s')} FROM stored_items AS s"""
+    ))
+
+def ensure_search_index(engine) -> bool:
+    """Create the FTS table and triggers if needed and backfill it when out of sync"""
+    global fts_available
+    try:
+        with engine.begin() as conn:
+            for statement in FTS_DDL:
+                conn.execute(text(statement))
+
+            indexed = conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar()
+            items = conn.execute(text("SELECT count(*) FROM stored_items")).scalar()
+            if indexed != items:
+                logger.info(f"Rebuilding full-text index ({indexed} indexed, {items} items)")
+                rebuild_search_index(conn)
+
+        fts_available = True
+    except Exception as e:
+        # SQLite builds without FTS5/JSON1 fall back to substring search
+        logger.error(f"Full-text search index unavailable: {str(e)}")
+        fts_available = False
+    return fts_available
+
+def build_match_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 MATCH expression.
+
+    Every word must match, and the last word is treated as a prefix so
+    results update while the user is still typing.
+    """
+    terms = [term.replace('"', '') for term in query.split()]
+    terms = [term for term in terms if term]
+    if not terms:
+        return ''
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
@@ -0,0 +1,47 @@
+# backend/database/migrations.py
+"""
+Versioned schema migrations, run at startup.
+
+The applied version is kept in SQLite's PRAGMA user_version. Each
+migration runs once, in order, in the same transaction as the version
+bump, so a failed migration leaves the database at the previous version.
+create_all() builds new databases from the models directly; migrations
+bring existing databases up to the same schema.
+"""
+
+from typing import Callable, List, Tuple
+import logging
+from .db import Base
+from .version import create_generation_tracking, create_storage_version_tracking, create_version_tracking
+
+logger = logging.getLogger(__name__)
+
+def create_declared_indexes(conn) -> None:
+    """Create every index declared on the models that the database lacks"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+# (version, description, apply(conn)); append only, never renumber
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, 'Indexes for listing filters, location lookups and joins', create_declared_indexes),
+    (2, 'Persisted inventory version maintained by triggers', create_version_tracking),
+    (3, 'Storage version for the hierarchy snapshot', create_storage_version_tracking),
+    (4, 'Inventory generation, bumped when a backup replaces the inventory', create_generation_tracking),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def schema_version(conn) -> int:
+    return conn.exec_driver_sql('PRAGMA user_version').scalar()
+
+def run_migrations(engine) -> int:
+    """Apply pending migrations; returns the resulting schema version"""
+    with engine.begin() as conn:
+        current = schema_version(conn)
+        pending = [migration for migration in MIGRATIONS if migration[0] > current]
+        for version, description, apply in pending:
+            logger.info(f"Applying migration {version}: {description}")
+            apply(conn)
+            conn.exec_driver_sql(f'PRAGMA user_version = {int(version)}')
+        return pending[-1][0] if pending else current
@@ -0,0 +1,66 @@
+# backend/database/statistics.py
+"""
+Query planner statistics that keep up with the data.
+
+ANALYZE records per-index row counts in sqlite_stat1, and the planner
+trusts them until the next ANALYZE: statistics taken while the inventory
+was small make it prefer full scans long after it has grown. PRAGMA
+optimize would refresh them, but before SQLite 3.46 it only considers
+tables queried on its own connection, and reads here run on query_only
+reader connections. So the writer re-analyzes every table whose row count
+has drifted from its recorded statistics, at startup, every
+STATS_REFRESH_INTERVAL seconds and at shutdown. Tables never analyzed are
+left to the planner's defaults.
+"""
+
+from typing import Dict, List
+import asyncio
+import logging
+import os
+from .db import run_db
+
+logger = logging.getLogger(__name__)
+
+STATS_DRIFT = float(os.getenv('STATS_DRIFT', '2'))  # Re-analyze once rows grew or shrank by this factor
+STATS_REFRESH_INTERVAL = float(os.getenv('STATS_REFRESH_INTERVAL', '3600'))  # Seconds
+SQLITE_ANALYSIS_LIMIT = int(os.getenv('SQLITE_ANALYSIS_LIMIT', '1000'))  # Rows sampled per index
+
+def recorded_row_counts(conn) -> Dict[str, int]:
+    """{table: row count} as of its last ANALYZE"""
+    if not conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+    ).first():
+        return {}
+    counts = {}
+    for table, stat in conn.exec_driver_sql("SELECT tbl, stat FROM sqlite_stat1"):
+        # The first number of every entry is the table's row count
+        counts[table] = int(stat.split()[0])
+    return counts
+
+def stale_tables(conn) -> List[str]:
+    stale = []
+    for table, recorded in recorded_row_counts(conn).items():
+        actual = conn.exec_driver_sql(f'SELECT count(*) FROM "{table}"').scalar()
+        if max(actual, recorded, 1) >= STATS_DRIFT * max(min(actual, recorded), 1):
+            stale.append(table)
+    return stale
+
+def refresh_statistics(engine) -> List[str]:
+    """Re-analyze tables whose statistics have drifted; returns their names"""
+    with engine.begin() as conn:
+        stale = stale_tables(conn)
+        if stale:
+            conn.exec_driver_sql(f'PRAGMA analysis_limit = {int(SQLITE_ANALYSIS_LIMIT)}')
+            for table in stale:
+                conn.exec_driver_sql(f'ANALYZE "{table}"')
+            logger.info(f"Refreshed planner statistics for {', '.join(stale)}")
+    return stale
+
+async def refresh_statistics_periodically(engine) -> None:
+    while True:
+        await asyncio.sleep(STATS_REFRESH_INTERVAL)
+        try:
+            await run_db(refresh_statistics, engine)
+        except Exception as e:
+            # Stale statistics only cost speed; never let them stop the loop
+            logger.error(f"Error refreshing planner statistics: {str(e)}")
@@ -0,0 +1,90 @@
+# backend/database/version.py
+"""
+Persisted inventory version for conditional GETs.
+
+inventory_state holds a single row whose version is bumped by triggers on
+the item and storage tables, in the same transaction as the write. Every
+writer moves it: the write queue, storage init, the backup-restore CLI and
+any other process sharing the database file. A rolled-back write doesn't.
+Read endpoints derive ETag and Last-Modified from it with one primary-key
+read, so an unchanged inventory is answered with 304 before the listing
+query runs. storage_version counts storage changes alone and keys the
+shared hierarchy snapshot. generation moves only when the inventory is
+replaced wholesale (backup restore), telling in-memory indexes that are
+otherwise kept current write by write to rebuild.
+"""
+
+from datetime import datetime, timezone
+from typing import List, Tuple
+from sqlalchemy import text
+from .db import run_in_read_session
+
+TRACKED_TABLES = ('stored_items', 'storage_level1', 'storage_level2', 'storage_level3')
+
+_BUMP_VERSION = (
+    "UPDATE inventory_state SET version = version + 1, "
+    "modified_at = CAST(strftime('%s', 'now') AS INTEGER) WHERE id = 1;"
+)
+
+def version_ddl() -> List[str]:
+    statements = [
+        """
+        CREATE TABLE IF NOT EXISTS inventory_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0,
+            modified_at INTEGER NOT NULL
+        )
+        """,
+        "INSERT OR IGNORE INTO inventory_state (id, version, modified_at) "
+        "VALUES (1, 0, CAST(strftime('%s', 'now') AS INTEGER))",
+    ]
+    for table in TRACKED_TABLES:
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            statements.append(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} "
+                f"AFTER {event} ON {table} BEGIN {_BUMP_VERSION} END"
+            )
+    return statements
+
+def create_version_tracking(conn) -> None:
+    """Create the version row and its triggers; idempotent"""
+    for statement in version_ddl():
+        conn.exec_driver_sql(statement)
+
+STORAGE_TABLES = ('storage_level1', 'storage_level2', 'storage_level3')
+
+_BUMP_STORAGE_VERSION = "UPDATE inventory_state SET storage_version = storage_version + 1 WHERE id = 1;"
+
+def create_storage_version_tracking(conn) -> None:
+    """storage_version: bumped only by storage changes, for the hierarchy snapshot"""
+    conn.exec_driver_sql("ALTER TABLE inventory_state ADD COLUMN storage_version INTEGER NOT NULL DEFAULT 0")
+    for table in STORAGE_TABLES:
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_storage_version_{event.lower()} "
+                f"AFTER {event} ON {table} BEGIN {_BUMP_STORAGE_VERSION} END"
+            )
+
+def create_generation_tracking(conn) -> None:
+    conn.exec_driver_sql("ALTER TABLE inventory_state ADD COLUMN generation INTEGER NOT NULL DEFAULT 0")
+
+def bump_generation(db) -> None:
+    """Mark the inventory as replaced; call in the transaction that replaces it"""
+    db.execute(text("UPDATE inventory_state SET generation = generation + 1 WHERE id = 1"))
+
+def read_version(db) -> Tuple[str, datetime]:
+    """(ETag value, Last-Modified) for the committed state the session sees"""
+    version, modified_at = db.execute(
+        text("SELECT version, modified_at FROM inventory_state WHERE id = 1")
+    ).one()
+    # modified_at in the tag too: a database replaced by a fresh file restarts the counter
+    return f"{version}-{modified_at}", datetime.fromtimestamp(modified_at, timezone.utc)
+
+async def current_version() -> Tuple[str, datetime]:
+    return await run_in_read_session(read_version)
+
+def read_storage_version(db) -> int:
+    return db.execute(text("SELECT storage_version FROM inventory_state WHERE id = 1")).scalar_one()
+
+def read_generation(db) -> int:
+    return db.execute(text("SELECT generation FROM inventory_state WHERE id = 1")).scalar_one()
@@ -0,0 +1,128 @@
+# backend/database/write_queue.py
+"""
+Group commit for request-level writes.
+
+Handlers submit a mutation, a callable taking a session, and await its
+result. A single writer task gathers the mutations that arrive while the
+previous batch is committing (plus a short collection window), runs each
+one in its own SAVEPOINT inside one transaction and commits once. A
+mutation that raises rolls back only its own savepoint, and its caller
+gets the exception. The others commit, so a burst of intake writes costs
+one fsync instead of one per request.
+
+Mutations must flush rather than commit; the queue owns the transaction.
+"""
+
+from typing import Any, Callable, List, Tuple
+import asyncio
+import logging
+import os
+from .db import SessionLocal, run_db
+
+logger = logging.getLogger(__name__)
+
+WRITE_QUEUE_WINDOW = float(os.getenv('WRITE_QUEUE_WINDOW_MS', '2')) / 1000
+WRITE_QUEUE_MAX_BATCH = int(os.getenv('WRITE_QUEUE_MAX_BATCH', '256'))
+
+class WriteQueue:
+    def __init__(self, window: float = WRITE_QUEUE_WINDOW, max_batch: int = WRITE_QUEUE_MAX_BATCH):
+        self.window = window  # Seconds to keep collecting after the first mutation arrives
+        self.max_batch = max_batch
+        self._queue = None
+        self._task = None
+        self._loop = None
+        self.batches = 0
+        self.mutations = 0
+
+    def _ensure_writer(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(db, *args, **kwargs) in the next group commit and return its result"""
+        self._ensure_writer()
+        future = self._loop.create_future()
+        await self._queue.put((fn, args, kwargs, future))
+        return await future
+
+    async def _collect(self) -> Tuple[List[Tuple], bool]:
+        """Next batch of mutations, and whether close() was requested"""
+        entry = await self._queue.get()
+        if entry is None:
+            return [], True
+        batch = [entry]
+        deadline = self._loop.time() + self.window
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                entry = self._queue.get_nowait()
+            else:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if entry is None:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._collect()
+            if not batch:
+                continue
+            try:
+                outcomes = await run_db(self._commit_batch, batch)
+            except Exception as e:
+                # The commit itself failed: nothing in the batch was written
+                logger.error(f"Group commit of {len(batch)} writes failed: {str(e)}")
+                outcomes = [(False, e)] * len(batch)
+
+            for (_, _, _, future), (ok, value) in zip(batch, outcomes):
+                if future.done():  # Caller went away
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def _commit_batch(self, batch: List[Tuple]) -> List[Tuple[bool, Any]]:
+        outcomes = []
+        with SessionLocal() as db:
+            for fn, args, kwargs, _ in batch:
+                try:
+                    with db.begin_nested():
+                        result = fn(db, *args, **kwargs)
+                    outcomes.append((True, result))
+                except Exception as e:
+                    outcomes.append((False, e))
+            db.commit()
+
+        self.batches += 1
+        self.mutations += len(batch)
+        if len(batch) > 1:
+            logger.debug(f"Group-committed {len(batch)} writes")
+        return outcomes
+
+    async def close(self) -> None:
+        """Let queued writes finish, then stop the writer task"""
+        if self._task is None or self._task.done():
+            return
+        await self._queue.put(None)
+        await self._task
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "mutations": self.mutations,
+            "avg_batch": self.mutations / self.batches if self.batches else 0.0
+        }
+
+# Shared queue for item and storage mutations
+write_queue = WriteQueue()
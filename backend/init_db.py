@@ -1,4 +1,6 @@
 from database.db import Base, engine
+from database.fts import ensure_search_index
+from database.migrations import run_migrations
 from api.models.storage import StorageLevel1, StorageLevel2, StorageLevel3, ContainerType
 from api.models.item import StoredItem
 from api.routes.storage_init import init_storage
@@ -8,6 +10,8 @@ def init_database():
     print("Creating database tables...")
     # Create all tables
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    ensure_search_index(engine)
     print("Database tables created successfully")
     
     # Initialize storage locations
@@ -0,0 +1,122 @@
+# backend/llm/image_prep.py
+"""
+Preprocessing for images sent to the vision model.
+
+Phone photos arrive as multi-megabyte JPEGs, far more pixels than the
+model uses. Before classification each image is auto-oriented from its
+EXIF tag, downscaled to VISION_MAX_EDGE pixels on its longest side and
+re-encoded as JPEG at VISION_JPEG_QUALITY. Results are cached per file
+(path, size and mtime), so re-classifying the same upload is free.
+"""
+
+from io import BytesIO
+from typing import Any, Dict
+import base64
+import logging
+import os
+import threading
+from PIL import ExifTags, Image, ImageOps
+from api.rag.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+VISION_MAX_EDGE = int(os.getenv('VISION_MAX_EDGE', '1536'))
+VISION_JPEG_QUALITY = int(os.getenv('VISION_JPEG_QUALITY', '80'))
+VISION_CACHE_SIZE = int(os.getenv('VISION_CACHE_SIZE', '32'))
+
+class PreparedImage:
+    """A vision-ready JPEG plus what it cost to produce"""
+
+    def __init__(self, data: bytes, original_bytes: int, size, original_size):
+        self.data = data
+        self.original_bytes = original_bytes
+        self.size = size  # (width, height) sent
+        self.original_size = original_size
+
+    @property
+    def data_url(self) -> str:
+        return f"data:image/jpeg;base64,{base64.b64encode(self.data).decode('ascii')}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "original_bytes": self.original_bytes,
+            "prepared_bytes": len(self.data),
+            "original_size": list(self.original_size),
+            "prepared_size": list(self.size)
+        }
+
+def to_rgb(image: Image.Image) -> Image.Image:
+    """Flatten any mode (palette, alpha, CMYK, 16-bit) to RGB on a white background"""
+    if image.mode == 'RGB':
+        return image
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+def prepare_image(path: str, max_edge: int = VISION_MAX_EDGE, quality: int = VISION_JPEG_QUALITY) -> PreparedImage:
+    """Orient, downscale and re-encode one image file"""
+    original_bytes = os.path.getsize(path)
+    with Image.open(path) as image:
+        source_format = image.format
+        original_size = image.size
+        rotated = image.getexif().get(ExifTags.Base.Orientation, 1) != 1
+        changed = rotated or max(original_size) > max_edge
+        # Let the JPEG decoder scale by 1/2..1/8 while decoding: far less work for big photos
+        image.draft('RGB', (max_edge, max_edge))
+        oriented = to_rgb(ImageOps.exif_transpose(image))
+        oriented.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+        buffer = BytesIO()
+        oriented.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+        data = buffer.getvalue()
+        size = oriented.size
+
+    # A small, upright JPEG is sent as-is when re-encoding would not shrink it
+    if not changed and source_format == 'JPEG' and original_bytes <= len(data):
+        with open(path, 'rb') as f:
+            data = f.read()
+        size = original_size
+    return PreparedImage(data, original_bytes, size, original_size)
+
+class ImagePreprocessor:
+    """prepare_image with a per-file cache and running byte totals"""
+
+    def __init__(self, max_edge: int = VISION_MAX_EDGE, quality: int = VISION_JPEG_QUALITY,
+                 cache_size: int = VISION_CACHE_SIZE):
+        self.max_edge = max_edge
+        self.quality = quality
+        self._cache = LRUCache(maxsize=cache_size, ttl=0)
+        self._lock = threading.Lock()  # Called from worker threads
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def prepare(self, path: str) -> PreparedImage:
+        stat = os.stat(path)
+        key = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns, self.max_edge, self.quality)
+        with self._lock:
+            prepared = self._cache.get(key)
+        if prepared is not None:
+            return prepared
+
+        prepared = prepare_image(path, self.max_edge, self.quality)
+        with self._lock:
+            self._cache.put(key, prepared)
+            self.bytes_in += prepared.original_bytes
+            self.bytes_out += len(prepared.data)
+        logger.info(
+            f"Prepared {os.path.basename(path)} for vision: "
+            f"{prepared.original_bytes / 1024:.0f} KiB {prepared.original_size[0]}x{prepared.original_size[1]} -> "
+            f"{len(prepared.data) / 1024:.0f} KiB {prepared.size[0]}x{prepared.size[1]}"
+        )
+        return prepared
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._cache.stats(),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": self.bytes_out / self.bytes_in if self.bytes_in else 1.0
+        }
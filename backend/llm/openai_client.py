@@ -0,0 +1,76 @@
+# backend/llm/openai_client.py
+"""
+Shared async OpenAI client for the LLM processors.
+
+Both processors talk to the API through one httpx.AsyncClient: one pool
+of keep-alive connections (multiplexed over HTTP/2 when the h2 package
+is installed), so concurrent classifications run in parallel without
+paying a TLS handshake each. The pool is closed when the app shuts down.
+"""
+
+from typing import Optional
+import logging
+import os
+import httpx
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', '120'))  # Seconds; vision calls can be slow
+OPENAI_CONNECT_TIMEOUT = float(os.getenv('OPENAI_CONNECT_TIMEOUT', '10'))
+OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', '20'))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv('OPENAI_KEEPALIVE_EXPIRY', '60'))
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '2'))
+OPENAI_HTTP2 = os.getenv('OPENAI_HTTP2', '1') == '1'
+
+_http_client: Optional[httpx.AsyncClient] = None
+_openai_client: Optional[AsyncOpenAI] = None
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401  (installed by httpx[http2])
+        return True
+    except ImportError:
+        return False
+
+def get_http_client() -> httpx.AsyncClient:
+    """The process-wide connection pool, created on first use"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        http2 = OPENAI_HTTP2 and http2_available()
+        if OPENAI_HTTP2 and not http2:
+            logger.warning("h2 is not installed; OpenAI requests fall back to HTTP/1.1")
+        _http_client = httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+                keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+            )
+        )
+    return _http_client
+
+def get_openai_client() -> AsyncOpenAI:
+    """AsyncOpenAI on the shared pool"""
+    global _openai_client
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        logger.error("OPENAI_API_KEY not found in environment variables")
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
+
+    if _openai_client is None:
+        _openai_client = AsyncOpenAI(
+            api_key=api_key,
+            http_client=get_http_client(),
+            max_retries=OPENAI_MAX_RETRIES
+        )
+    return _openai_client
+
+async def close_http_client() -> None:
+    """Close pooled connections; called when the app stops serving"""
+    global _http_client, _openai_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+    _openai_client = None
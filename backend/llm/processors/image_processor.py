@@ -1,13 +1,12 @@
 import os
-import base64
-from openai import OpenAI
+import asyncio
 from dotenv import load_dotenv
 import logging
-import httpx
 import re
 import json
-from database.db import SessionLocal
-from api.models.storage import StorageLevel1
+from api.storage.hierarchy import storage_hierarchy
+from llm.openai_client import get_openai_client
+from llm.image_prep import ImagePreprocessor
 
 logger = logging.getLogger(__name__)
 
@@ -15,52 +14,24 @@ load_dotenv()
 
 class ImageProcessor:
     def __init__(self):
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
-            logger.error("OPENAI_API_KEY not found in environment variables")
-            raise ValueError("OPENAI_API_KEY not found in environment variables")
-            
-        # Create a custom httpx client without proxies
-        http_client = httpx.Client(
-            base_url="https://api.openai.com/v1",
-            headers={"Authorization": f"Bearer {api_key}"}
-        )
-        
-        self.client = OpenAI(
-            api_key=api_key,
-            http_client=http_client
-        )
-        
         # Set the vision model from environment variable or use default
         self.vision_model = os.getenv('OPENAI_VISION_MODEL', 'gpt-4o')
+        # Downscaled, re-encoded copies of uploads, cached per file
+        self.preprocessor = ImagePreprocessor()
+
+    @property
+    def client(self):
+        """Shared AsyncOpenAI client; recreated if the pool was closed"""
+        return get_openai_client()
 
-    def get_storage_structure(self):
+    async def get_storage_structure(self):
         """Get current storage structure to help with location suggestions"""
-        db = SessionLocal()
-        try:
-            shelves = db.query(StorageLevel1).all()
-            storage_info = []
-            for shelf in shelves:
-                shelf_info = {
-                    "shelf_name": shelf.name,
-                    "shelf_description": shelf.description,
-                    "containers": []
-                }
-                for container in shelf.containers:
-                    shelf_info["containers"].append({
-                        "name": container.name,
-                        "type": container.container_type.value,
-                        "description": container.description
-                    })
-                storage_info.append(shelf_info)
-            return storage_info
-        finally:
-            db.close()
+        return (await storage_hierarchy.get_async()).structure
 
     def encode_image(self, image_path):
+        """Vision-ready data URL: oriented, downscaled and recompressed"""
         try:
-            with open(image_path, "rb") as image_file:
-                return base64.b64encode(image_file.read()).decode('utf-8')
+            return self.preprocessor.prepare(image_path).data_url
         except Exception as e:
             logger.error(f"Error encoding image: {str(e)}", exc_info=True)
             raise
@@ -73,7 +44,7 @@ class ImageProcessor:
         # Remove any leading/trailing whitespace
         return json_str.strip()
 
-    def process_image(self, image_path):
+    async def process_image(self, image_path):
         try:
             logger.info(f"Processing image: {image_path}")
             
@@ -82,10 +53,10 @@ class ImageProcessor:
                 raise FileNotFoundError(f"Image file not found: {image_path}")
             
             # Get storage structure
-            storage_info = self.get_storage_structure()
+            storage_info = await self.get_storage_structure()
             
-            # Encode image to base64
-            base64_image = self.encode_image(image_path)
+            # Decoding and resizing a phone photo takes a while; keep it off the event loop
+            image_url = await asyncio.to_thread(self.encode_image, image_path)
             logger.debug("Image encoded successfully")
 
             # Prepare the prompt for GPT-4 Vision
@@ -139,7 +110,7 @@ class ImageProcessor:
             Ensure all technical details are accurate and comprehensive. Use actual shelf and container names from the provided storage structure."""
 
             logger.debug("Making API request to OpenAI")
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.vision_model,
                 messages=[
                     {
@@ -149,7 +120,7 @@ class ImageProcessor:
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
+                                    "url": image_url
                                 }
                             }
                         ]
@@ -1,11 +1,9 @@
 import os
-from openai import OpenAI
 from dotenv import load_dotenv
 import logging
-import httpx
 import json
-from database.db import SessionLocal
-from api.models.storage import StorageLevel1
+from api.storage.hierarchy import storage_hierarchy
+from llm.openai_client import get_openai_client
 
 logger = logging.getLogger(__name__)
 
@@ -13,44 +11,16 @@ load_dotenv()
 
 class TextProcessor:
     def __init__(self):
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
-            logger.error("OPENAI_API_KEY not found in environment variables")
-            raise ValueError("OPENAI_API_KEY not found in environment variables")
-            
-        http_client = httpx.Client(
-            base_url="https://api.openai.com/v1",
-            headers={"Authorization": f"Bearer {api_key}"}
-        )
-        
-        self.client = OpenAI(
-            api_key=api_key,
-            http_client=http_client
-        )
-        
         self.text_model = os.getenv('OPENAI_TEXT_MODEL', 'gpt-4')
 
-    def get_storage_structure(self):
-        db = SessionLocal()
-        try:
-            shelves = db.query(StorageLevel1).all()
-            storage_info = []
-            for shelf in shelves:
-                shelf_info = {
-                    "shelf_name": shelf.name,
-                    "shelf_description": shelf.description,
-                    "containers": []
-                }
-                for container in shelf.containers:
-                    shelf_info["containers"].append({
-                        "name": container.name,
-                        "type": container.container_type.value,
-                        "description": container.description
-                    })
-                storage_info.append(shelf_info)
-            return storage_info
-        finally:
-            db.close()
+    @property
+    def client(self):
+        """Shared AsyncOpenAI client; recreated if the pool was closed"""
+        return get_openai_client()
+
+    async def get_storage_structure(self):
+        """Get current storage structure to help with location suggestions"""
+        return (await storage_hierarchy.get_async()).structure
 
     def clean_json_string(self, json_str: str) -> str:
         # Remove markdown code blocks
@@ -58,11 +28,11 @@ class TextProcessor:
         # Remove any leading/trailing whitespace
         return json_str.strip()
 
-    def process_text(self, description: str):
+    async def process_text(self, description: str):
         try:
             logger.info(f"Processing text description: {description}")
             
-            storage_info = self.get_storage_structure()
+            storage_info = await self.get_storage_structure()
             storage_context = json.dumps(storage_info, indent=2)
 
             system_prompt = """You are a helpful assistant that analyzes electronic component descriptions and returns structured data about them. 
@@ -112,7 +82,7 @@ Always respond with valid JSON data following the exact structure provided."""
                 ]
             }}"""
 
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.text_model,
                 messages=[
                     {"role": "system", "content": system_prompt},
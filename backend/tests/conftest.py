@@ -0,0 +1,6 @@
+# backend/tests/conftest.py
+import sys
+from pathlib import Path
+
+# Import application modules the way app.py does, from the backend directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
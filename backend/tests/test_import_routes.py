@@ -0,0 +1,53 @@
+# backend/tests/test_import_routes.py
+import asyncio
+import csv
+import io
+import pytest
+from api.routes.inventory.import_routes import RowError, iter_csv_records
+
+async def stream(text: str, chunk_size: int):
+    data = text.encode()
+    for i in range(0, len(data), chunk_size):
+        yield data[i:i + chunk_size]
+
+def parse(text: str, chunk_size: int = 7):
+    async def collect():
+        return [record async for record in iter_csv_records(stream(text, chunk_size))]
+    return asyncio.run(collect())
+
+def stdlib_records(text: str):
+    rows = [row for row in csv.reader(io.StringIO(text)) if row]
+    header = [name.strip().lower() for name in rows[0]]
+    return [dict(zip(header, row)) for row in rows[1:]]
+
+def test_stray_quote_in_unquoted_field_does_not_swallow_later_rows():
+    text = (
+        'category,brand,model\n'
+        'Monitor,Dell,24" display\n'
+        'Cable,Generic,USB-C\n'
+        'Tool,Wera,"Kraftform, 6 pcs"\n'
+    )
+    for chunk_size in (1, 5, len(text)):
+        records = parse(text, chunk_size)
+        assert records == stdlib_records(text)
+        assert [record['category'] for record in records] == ['Monitor', 'Cable', 'Tool']
+
+def test_quoted_field_spanning_lines_and_chunks():
+    text = 'category,model\r\nResistor,"line one\nline two"\r\n\r\nCapacitor,100nF'
+    for chunk_size in (1, 3, len(text)):
+        assert parse(text, chunk_size) == [
+            {'category': 'Resistor', 'model': 'line one\nline two'},
+            {'category': 'Capacitor', 'model': '100nF'},
+        ]
+
+def test_unterminated_quoted_field_is_reported_after_complete_rows():
+    text = 'category,model\nResistor,10k\nCapacitor,"100nF\n'
+    records = []
+
+    async def collect():
+        async for record in iter_csv_records(stream(text, 4)):
+            records.append(record)
+
+    with pytest.raises(RowError, match='Unterminated'):
+        asyncio.run(collect())
+    assert records == [{'category': 'Resistor', 'model': '10k'}]
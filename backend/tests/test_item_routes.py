@@ -0,0 +1,18 @@
+# backend/tests/test_item_routes.py
+import pytest
+from api.routes.inventory.item_routes import BulkRequestError, bulk_conditions, bulk_values
+
+@pytest.mark.parametrize('payload', [[1], 'category', 3])
+def test_bulk_filter_must_be_an_object(payload):
+    with pytest.raises(BulkRequestError, match='filter must be an object'):
+        bulk_conditions({'filter': payload})
+
+@pytest.mark.parametrize('payload', [['category'], 'Tools'])
+def test_bulk_set_must_be_an_object(payload):
+    # Rejected before the session is touched
+    with pytest.raises(BulkRequestError, match='set must be an object'):
+        bulk_values(None, payload)
+
+def test_bulk_filter_rejects_unknown_fields():
+    with pytest.raises(BulkRequestError, match='Unknown filter fields: name'):
+        bulk_conditions({'filter': {'name': 'x'}})
@@ -0,0 +1,24 @@
+# backend/tests/test_pagination.py
+import pytest
+from werkzeug.datastructures import MultiDict
+from api.routes.inventory.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, CursorError, encode_cursor, page_params
+)
+
+def params(**args):
+    return page_params(MultiDict(args))
+
+def test_no_limit_or_cursor_means_unpaginated():
+    assert params() == ('id', None, None)
+
+def test_cursor_without_limit_uses_default_page_size():
+    assert params(cursor=encode_cursor('id', (10,))) == ('id', DEFAULT_PAGE_SIZE, (10,))
+
+def test_limit_is_capped():
+    assert params(limit='20')[1] == 20
+    assert params(limit=str(MAX_PAGE_SIZE + 1))[1] == MAX_PAGE_SIZE
+
+@pytest.mark.parametrize('limit', ['0', '-5'])
+def test_limit_below_one_is_rejected(limit):
+    with pytest.raises(CursorError, match='limit must be at least 1'):
+        params(limit=limit)
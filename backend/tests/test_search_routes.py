@@ -0,0 +1,21 @@
+# backend/tests/test_search_routes.py
+from werkzeug.datastructures import MultiDict
+from api.routes.inventory.search_routes import (
+    DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT, limit_param
+)
+
+def limit(**args):
+    return limit_param(MultiDict(args), DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT)
+
+def test_limit_defaults_when_missing_or_not_a_number():
+    assert limit() == DEFAULT_SEARCH_LIMIT
+    assert limit(limit='ten') == DEFAULT_SEARCH_LIMIT
+
+def test_limit_is_capped():
+    assert limit(limit='5') == 5
+    assert limit(limit=str(MAX_SEARCH_LIMIT + 1)) == MAX_SEARCH_LIMIT
+
+def test_limit_below_one_is_raised_to_one():
+    # LIMIT -1 would return every match
+    assert limit(limit='-1') == 1
+    assert limit(limit='0') == 1
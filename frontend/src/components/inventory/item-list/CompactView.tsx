@@ -4,6 +4,7 @@
 import React, { useState } from 'react';
 import { Eye, ChevronUp, ChevronDown } from 'lucide-react';
 import { StoredItem, EditingItem } from '@/types/itemTypes';
+import { originalImageUrl, imageVariantUrl } from '@/utils/imageUrls';
 import { ItemFilters, SearchBar } from '../shared';
 import { useItemData } from './hooks/useItemData';
 import { ItemDetailsPopover } from './components/ItemDetailsPopover';
@@ -254,10 +255,11 @@ export const CompactView = () => {
                       {item.image_path ? (
                         <div 
                           className="w-16 h-16 relative group"
-                          onClick={(e) => handleImageClick(e, `http://localhost:5000/static/${item.image_path}`)}
+                          onClick={(e) => handleImageClick(e, originalImageUrl(item.image_path!))}
                         >
                           <img
-                            src={`http://localhost:5000/static/${item.image_path}`}
+                            src={imageVariantUrl(item.image_path, 'thumb')}
+                            loading="lazy"
                             alt={`${item.category} - ${item.brand || ''}`}
                             className="w-full h-full object-cover rounded-lg cursor-zoom-in"
                           />
@@ -3,6 +3,7 @@ import { StoredItem } from '@/types/itemTypes';
 import { X, Edit2, Trash2 } from 'lucide-react';
 import { ItemBasicInfo, ItemTechnicalDetails } from '../../shared';
 import ImagePreview from '@/components/common/ImagePreview';
+import { originalImageUrl, imageVariantUrl } from '@/utils/imageUrls';
 
 interface ItemDetailsModalProps {
   item: StoredItem;
@@ -23,7 +24,8 @@ export const ItemDetailsModal: React.FC<ItemDetailsModalProps> = ({
 
   if (!isOpen) return null;
 
-  const imageUrl = item.image_path ? `http://localhost:5000/static/${item.image_path}` : null;
+  const imageUrl = item.image_path ? imageVariantUrl(item.image_path, 'medium') : null;
+  const fullImageUrl = item.image_path ? originalImageUrl(item.image_path) : null;
 
   const handleDelete = () => {
     if (window.confirm('Are you sure you want to delete this item?')) {
@@ -101,9 +103,9 @@ export const ItemDetailsModal: React.FC<ItemDetailsModalProps> = ({
       </div>
 
       {/* Image Preview Modal */}
-      {imageUrl && (
+      {fullImageUrl && (
         <ImagePreview
-          imageUrl={imageUrl}
+          imageUrl={fullImageUrl}
           isOpen={showFullImage}
           onClose={() => setShowFullImage(false)}
         />
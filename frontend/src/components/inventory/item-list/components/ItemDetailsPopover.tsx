@@ -1,6 +1,7 @@
 // frontend/src/components/inventory/item-list/components/ItemDetailsPopover.tsx
 import React, { useEffect, useState } from 'react';
 import { StoredItem } from '@/types/itemTypes';
+import { imageVariantUrl } from '@/utils/imageUrls';
 
 interface ItemDetailsPopoverProps {
   item: StoredItem;
@@ -38,7 +39,7 @@ export const ItemDetailsPopover: React.FC<ItemDetailsPopoverProps> = ({ item, po
         {/* Image */}
         {item.image_path && (
           <img
-            src={`http://localhost:5000/static/${item.image_path}`}
+            src={imageVariantUrl(item.image_path, 'medium')}
             alt={`${item.category} - ${item.brand || ''}`}
             className="w-full h-48 object-contain rounded-lg border"
           />
@@ -1,10 +1,13 @@
 // frontend/src/components/inventory/item-list/hooks/useItemData.ts
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { debounce } from 'lodash';
 import axios from 'axios';
 import { StoredItem } from '@/types/itemTypes';
 import { usePersistentSearch } from './usePersistentSearch';
 
+const ITEMS_URL = 'http://localhost:5000/api/inventory/items';
+const PAGE_SIZE = 200;
+
 export const useItemData = () => {
   const [items, setItems] = useState<StoredItem[]>([]);
   const [filteredItems, setFilteredItems] = useState<StoredItem[]>([]);
@@ -12,18 +15,35 @@ export const useItemData = () => {
   const [error, setError] = useState<string | null>(null);
   const [searchQuery, setSearchQuery] = usePersistentSearch();
 
+  const fetchGeneration = useRef(0);
+
+  // Show the first page as soon as it arrives, then append the rest in the background
   const fetchItems = async () => {
+    const generation = ++fetchGeneration.current;
     try {
       setIsLoading(true);
-      const response = await axios.get('http://localhost:5000/api/inventory/items');
-      setItems(response.data.items);
-      setFilteredItems(response.data.items);
-      setError(null);
+      let loaded: StoredItem[] = [];
+      let cursor: string | null = null;
+      do {
+        const response: { data: { items: StoredItem[]; next_cursor: string | null } } = await axios.get(ITEMS_URL, {
+          params: { limit: PAGE_SIZE, ...(cursor ? { cursor } : {}) }
+        });
+        // A newer fetch (e.g. after a delete) supersedes this one
+        if (generation !== fetchGeneration.current) return;
+
+        loaded = [...loaded, ...response.data.items];
+        cursor = response.data.next_cursor;
+        setItems(loaded);
+        setFilteredItems(loaded);
+        setError(null);
+        setIsLoading(false);
+      } while (cursor);
     } catch (error: any) {
+      if (generation !== fetchGeneration.current) return;
       setError(error.response?.data?.error || 'Error loading items');
       console.error('Error fetching items:', error);
     } finally {
-      setIsLoading(false);
+      if (generation === fetchGeneration.current) setIsLoading(false);
     }
   };
 
@@ -1,6 +1,7 @@
 // frontend/src/components/inventory/ItemBasicInfo.tsx
 import React, { useState, useEffect } from 'react';
 import { StoredItem } from '../types/itemTypes';
+import { imageVariantUrl } from '@/utils/imageUrls';
 
 interface ItemBasicInfoProps {
   item: StoredItem;
@@ -28,8 +29,8 @@ export default function ItemBasicInfo({ item }: ItemBasicInfoProps) {
       );
     }
 
-    // Construct the full image URL
-    const imageUrl = `http://localhost:5000/static/${item.image_path}`;
+    // Thumbnail derivative; the box is too small for the original upload
+    const imageUrl = imageVariantUrl(item.image_path, 'thumb');
     console.log('Attempting to load image from:', imageUrl); // Debug log
 
     return (
@@ -0,0 +1,10 @@
+const API_BASE = 'http://localhost:5000';
+
+export type ImageSize = 'thumb' | 'medium';
+
+// Full-resolution upload, for zoom views
+export const originalImageUrl = (imagePath: string) => `${API_BASE}/static/${imagePath}`;
+
+// Resized variant rendered by the backend; cached by the browser indefinitely
+export const imageVariantUrl = (imagePath: string, size: ImageSize, format: 'webp' | 'jpeg' = 'webp') =>
+    `${API_BASE}/api/images/derivatives/${size}/${imagePath}?format=${format}`;